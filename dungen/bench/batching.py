@@ -0,0 +1,68 @@
+import json
+import time
+import argparse
+import threading
+from ..models import Config, ChatPrompt
+from ..inference.batching import BatchingEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure batched narrative inference throughput")
+    parser.add_argument("--inference", default="config.yaml", help="Path to model configuration YAML file")
+    parser.add_argument("--settings", default="fantasy.yaml", help="Path to game configuration YAML file")
+    parser.add_argument("--model", help="Override the narrative model, e.g. sshleifer/tiny-gpt2 on CPU")
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent game sessions")
+    parser.add_argument("--turns", type=int, default=4, help="Turns per session")
+    parser.add_argument("--max-tokens", type=int, help="Override max_tokens")
+    parser.add_argument("--batch-size", type=int, help="Override batch_max_size")
+    parser.add_argument("--max-wait-ms", type=float, help="Override batch_max_wait_ms")
+    args = parser.parse_args()
+
+    config = Config(args.inference, args.settings)
+    if args.model:
+        config.narrative_model = args.model
+    if args.max_tokens:
+        config.max_tokens = args.max_tokens
+    if args.batch_size:
+        config.batch_max_size = args.batch_size
+    if args.max_wait_ms is not None:
+        config.batch_max_wait_ms = args.max_wait_ms
+
+    engine = BatchingEngine(config)
+    latencies = []
+    latencies_lock = threading.Lock()
+
+    def session(index: int):
+        prompt = ChatPrompt(config.system_prompt)
+        for turn in range(args.turns):
+            prompt.append("user", f"Player {index} takes turn {turn}.")
+            started = time.monotonic()
+            content = engine.generate(prompt.render())
+            with latencies_lock:
+                latencies.append(time.monotonic() - started)
+            prompt.append("assistant", content)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=session, args=(index,)) for index in range(args.sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    report = engine.report()
+    report.update({
+        "model": config.narrative_model,
+        "sessions": args.sessions,
+        "turns": args.turns,
+        "wall_seconds": elapsed,
+        "turns_per_second": len(latencies) / elapsed,
+        "p50_turn_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_turn_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+    })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import gc
+import json
+import time
+import random
+import argparse
+import tracemalloc
+from ..models import EncounterEntry
+from ..game.encounters import EncounterLog, npc_key
+from .turns import summarize
+
+DIALOG = "Stay back, traveler. These halls have swallowed braver souls than you, and the dark remembers every one of them."
+
+
+def scripted_entries(turns: int, npcs: int, seed: int):
+    rng = random.Random(seed)
+    names = [f"Npc {index}" for index in range(npcs)]
+    for turn in range(1, turns + 1):
+        yield EncounterEntry(turn, rng.choice(names), rng.randint(0, 100), rng.randint(0, 20), f"{DIALOG} ({turn})")
+
+
+def list_last_met(entries: list, npc: str, before: int):
+    key = npc_key(npc)
+    for entry in reversed(entries):
+        if entry.turn < before and npc_key(entry.npc) == key:
+            return entry
+    return None
+
+
+def measure(build, turns: int, npcs: int, seed: int):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    log = build()
+    for entry in scripted_entries(turns, npcs, seed):
+        log.append(entry)
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return log, {"append_s": elapsed, "current_kib": current / 1024, "peak_kib": peak / 1024}
+
+
+def time_calls(call, queries: list) -> dict:
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        call(query)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    queries = [(f"Npc {rng.randrange(args.npcs)}", args.turns - args.recent) for _ in range(args.queries)]
+
+    entries, list_memory = measure(list, args.turns, args.npcs, args.seed)
+    log, log_memory = measure(lambda: EncounterLog(None, args.memory_limit, args.index_limit), args.turns, args.npcs, args.seed)
+    try:
+        mismatches = sum(
+            1 for npc, before in queries
+            if list_last_met(entries, npc, before) != log.last_met(npc, before)
+        )
+        return {
+            "turns": args.turns,
+            "npcs": args.npcs,
+            "memory_limit": args.memory_limit,
+            "index_limit": args.index_limit,
+            "list": {
+                **list_memory,
+                "recent": time_calls(lambda _: entries[-args.recent:], queries),
+                "last_met": time_calls(lambda query: list_last_met(entries, *query), queries),
+            },
+            "encounter_log": {
+                **log_memory,
+                "recent": time_calls(lambda _: log.recent(args.recent), queries),
+                "last_met": time_calls(lambda query: log.last_met(*query), queries),
+                "history": time_calls(lambda query: log.history(query[0], 5, query[1]), queries),
+            },
+            "mismatches": mismatches,
+        }
+    finally:
+        log.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the DUNGEN! encounter log against a plain list over a long game")
+    parser.add_argument("--turns", type=int, default=20000, help="Encounters to append")
+    parser.add_argument("--npcs", type=int, default=500, help="Distinct NPC names")
+    parser.add_argument("--memory-limit", type=int, default=256, help="Encounters kept in memory")
+    parser.add_argument("--index-limit", type=int, default=256, help="NPCs kept in the last-met index")
+    parser.add_argument("--recent", type=int, default=5, help="Recent encounters read per turn")
+    parser.add_argument("--queries", type=int, default=1000, help="Lookups to time")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
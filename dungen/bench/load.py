@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import yaml
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import requests
+import socketio
+from .stub_runpod import serve
+from .turns import summarize
+from ..webui.launch import launch, terminate
+
+REACTIONS = ["Draw your sword", "Try to talk to the goblin", "Search the room", "Back away into the corridor"]
+
+
+def prepare_configs(args, workdir: str, stub_url: str) -> str:
+    with open(args.inference) as config_file:
+        model_parameters = yaml.safe_load(config_file) or {}
+    model_parameters.update({
+        "runpod_base_url": f"{stub_url}/v2",
+        "endpoint_id": "stub",
+        "response_cache": False,
+    })
+    inference_path = os.path.join(workdir, "config.yaml")
+    with open(inference_path, "w") as config_file:
+        yaml.safe_dump(model_parameters, config_file)
+    shutil.copy(args.settings, os.path.join(workdir, os.path.basename(args.settings)))
+    return inference_path
+
+
+def wait_ready(urls, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    for url in urls:
+        while True:
+            try:
+                requests.get(url, timeout=1)
+                break
+            except requests.ConnectionError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"{url} did not start within {timeout}s")
+                time.sleep(0.2)
+
+
+def player(url: str, settings: str, turns: int, timeout: float, latencies: list, errors: list, lock):
+    client = socketio.Client(reconnection=False)
+    ready = threading.Event()
+    stopped = threading.Event()
+    failures = []
+
+    def on_error(error):
+        failures.append(str(error))
+        stopped.set()
+
+    def wait(started: float):
+        while not ready.wait(0.05):
+            if stopped.is_set():
+                raise RuntimeError(failures[0] if failures else "game stopped")
+            if time.monotonic() - started > timeout:
+                raise TimeoutError(f"no response within {timeout}s")
+
+    client.on("game_ready", lambda *args: ready.set())
+    client.on("game_stopped", lambda *args: stopped.set())
+    client.on("error", on_error)
+
+    try:
+        client.connect(url, wait_timeout=timeout)
+        client.emit("start_game", {"settings": settings, "mapGen": False})
+        wait(time.monotonic())
+        for turn in range(turns):
+            ready.clear()
+            started = time.monotonic()
+            client.emit("game_input", REACTIONS[turn % len(REACTIONS)] + "\n")
+            wait(started)
+            with lock:
+                latencies.append(time.monotonic() - started)
+    except Exception as exception:
+        with lock:
+            errors.append(repr(exception))
+    finally:
+        if client.connected:
+            client.emit("stop_game")
+            client.disconnect()
+
+
+def run(args, workers: int, inference_path: str, workdir: str, env: dict) -> dict:
+    ports = [args.base_port + index for index in range(workers)]
+    urls = [f"http://127.0.0.1:{port}" for port in ports]
+    server_args = ["--inference", inference_path, "--settings-dir", workdir, "--max-sessions", str(args.players)]
+    processes = launch(workers, args.base_port, "127.0.0.1", args.async_mode, args.message_queue, server_args, env, subprocess.DEVNULL)
+    try:
+        wait_ready(urls)
+        latencies, errors, lock = [], [], threading.Lock()
+        settings = os.path.basename(args.settings)
+        threads = [
+            threading.Thread(target=player, args=(urls[index % workers], settings, args.turns, args.timeout, latencies, errors, lock))
+            for index in range(args.players)
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+    finally:
+        terminate(processes)
+
+    return {
+        "workers": workers,
+        "players": args.players,
+        "turns": len(latencies),
+        "errors": len(errors),
+        "first_errors": errors[:3],
+        "wall_seconds": elapsed,
+        "turns_per_second": len(latencies) / elapsed if elapsed else None,
+        "turn_latency": summarize(latencies) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Web UI with simulated players against stub inference")
+    parser.add_argument("--inference", default="config.yaml", help="Path to model configuration YAML file")
+    parser.add_argument("--settings", default="fantasy.yaml", help="Path to game configuration YAML file")
+    parser.add_argument("--workers", default="1,2,4", help="Comma separated worker counts to compare")
+    parser.add_argument("--players", type=int, default=16, help="Concurrent simulated players")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per player")
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub narrative latency (s)")
+    parser.add_argument("--assistant-latency", type=float, default=0.2, help="Stub structured response latency (s)")
+    parser.add_argument("--async-mode", choices=["threading", "eventlet", "gevent"], help="Flask-SocketIO async mode for the workers")
+    parser.add_argument("--message-queue", help="Message queue URL shared by the workers")
+    parser.add_argument("--base-port", type=int, default=5101, help="Port of the first worker")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds before a turn counts as failed")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    stub = serve(latency=args.latency, assistant_latency=args.assistant_latency)
+    stub_url = f"http://127.0.0.1:{stub.server_port}"
+    workdir = tempfile.mkdtemp(prefix="dungen-load-")
+    env = dict(os.environ, OPENAI_BASE_URL=f"{stub_url}/v1", OPENAI_API_KEY="stub", REQUEST_KEY="stub", HF_HUB_OFFLINE="1")
+    try:
+        inference_path = prepare_configs(args, workdir, stub_url)
+        results = [run(args, int(workers), inference_path, workdir, env) for workers in args.workers.split(",")]
+    finally:
+        stub.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps({"stub_latency": args.latency, "assistant_latency": args.assistant_latency, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from types import SimpleNamespace
+from ..game.chapters import ChapterStore
+from ..game.memory import MemoryIndex
+from .turns import summarize
+
+SYLLABLES = "ka ri to mo ne sha vel dor an ith ul gar bren th os wyn".split()
+WORDS = ["".join(SYLLABLES[(index // len(SYLLABLES) ** place) % len(SYLLABLES)] for place in range(3)) for index in range(4000)]
+WEIGHTS = [1 / rank for rank in range(1, len(WORDS) + 1)]
+
+
+def text(rng, length: int) -> str:
+    return " ".join(rng.choices(WORDS, WEIGHTS, k=length))
+
+
+def timed(call, samples: list):
+    started = time.perf_counter()
+    result = call()
+    samples.append(time.perf_counter() - started)
+    return result
+
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix="dungen-memory-")
+    config = SimpleNamespace(memory_retrieval=True, memory_top_k=args.top_k, memory_token_budget=args.token_budget)
+    try:
+        chapters = ChapterStore(os.path.join(workdir, "bench.db"))
+        for _ in range(args.chapters):
+            chapters.append(text(rng, args.chapter_words))
+
+        backfill = []
+        memory = MemoryIndex(config, os.path.join(workdir, "bench.memory.db"), chapters)
+        timed(lambda: memory.connection, backfill)
+        memory.close()
+
+        load, add_dialog, add_chapter, search = [], [], [], []
+        memory = MemoryIndex(config, os.path.join(workdir, "bench.memory.db"), chapters)
+        timed(lambda: memory.connection, load)
+        for turn in range(1, args.dialogs + 1):
+            timed(lambda: memory.add_dialog(turn, rng.choice(WORDS).title(), text(rng, 12)), add_dialog)
+        for chapter in range(args.chapters + 1, args.chapters + 11):
+            timed(lambda: memory.add_chapter(chapter, text(rng, args.chapter_words)), add_chapter)
+        results = 0
+        for _ in range(args.queries):
+            results += len(timed(lambda: memory.search(text(rng, 8), before_turn=args.dialogs - 5), search))
+        memory.close()
+        chapters.close()
+
+        return {
+            "chapters": args.chapters,
+            "dialogs": args.dialogs,
+            "index_bytes": os.path.getsize(os.path.join(workdir, "bench.memory.db")),
+            "backfill": summarize(backfill),
+            "load": summarize(load),
+            "add_dialog": summarize(add_dialog),
+            "add_chapter": summarize(add_chapter),
+            "search": summarize(search),
+            "results_per_query": results / args.queries if args.queries else 0.0,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the DUNGEN! chapter and dialog retrieval index")
+    parser.add_argument("--chapters", type=int, default=5000, help="Chapter summaries in the store")
+    parser.add_argument("--chapter-words", type=int, default=200, help="Words per chapter summary")
+    parser.add_argument("--dialogs", type=int, default=5000, help="Dialog lines to index")
+    parser.add_argument("--queries", type=int, default=500, help="Searches to time")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--token-budget", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import sys
+import argparse
+import subprocess
+
+HEAVY_MODULES = ("torch", "transformers", "accelerate")
+
+
+def import_times(module: str):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to import {module}:\n{result.stderr}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = len(name) - len(name.lstrip()) - 1
+        entries.append((int(self_us), int(cumulative_us), name.strip(), depth))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report DUNGEN! startup import time")
+    parser.add_argument("--module", default="dungen.game", help="Module to import")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    parser.add_argument("--budget-ms", type=float, help="Fail if the total import time exceeds this")
+    args = parser.parse_args()
+
+    entries = import_times(args.module)
+    total_ms = sum(cumulative for _, cumulative, _, depth in entries if depth == 0) / 1000
+
+    print(f"{'cumulative ms':>14} {'self ms':>10}  module")
+    for self_us, cumulative_us, name, depth in sorted(entries, key=lambda e: e[1], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>10.1f}  {name}")
+    print(f"\nimport {args.module}: {total_ms:.1f} ms across {len(entries)} modules")
+
+    failures = []
+    heavy = sorted({name for _, _, name, _ in entries if name.split(".")[0] in HEAVY_MODULES})
+    if heavy:
+        failures.append(f"local inference modules imported eagerly: {', '.join(heavy)}")
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.1f} ms exceeds budget of {args.budget_ms:.1f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
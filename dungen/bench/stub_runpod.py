@@ -0,0 +1,187 @@
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_NARRATIVE = (
+    "<narrative>The torchlight gutters as you step into a low vaulted chamber. Water drips from the ceiling "
+    "and pools between cracked flagstones. At the far end a hunched Goblin Warrior looks up from a pile of bones, "
+    "rusted blade in hand.</narrative>\n"
+    "<next_reaction>Draw your sword | Try to talk to the goblin | Back away into the corridor</next_reaction>\n"
+    "<game_status>player_health_change: -5 | player_stamina_change: -10 | npc: Goblin Warrior | npc_health: 25 | "
+    "dialog: \"You'll never escape alive!\"</game_status>\n<|end_dm_turn|>"
+)
+STUB_STRUCTURED = {
+    "narrative": "The torchlight gutters as you step into a low vaulted chamber. At the far end a hunched Goblin Warrior looks up from a pile of bones, rusted blade in hand.",
+    "next_reaction": ["Draw your sword", "Try to talk to the goblin", "Back away into the corridor"],
+    "game_status": {
+        "player_health_change": -5,
+        "player_stamina_change": -10,
+        "inventory_update": None,
+        "npc": "Goblin Warrior",
+        "npc_health": 25,
+        "dialog": "You'll never escape alive!",
+    },
+}
+STUB_CHAPTER = "The hero fought goblins, bargained with a merchant and pressed deeper into the dungeon."
+
+
+class StubJob:
+    def __init__(self, text: str, latency: float, chunk_size: int):
+        self.created = time.monotonic()
+        self.latency = latency
+        self.chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        self.streamed = 0
+
+    def ready(self) -> bool:
+        return time.monotonic() - self.created >= self.latency
+
+    def output(self) -> list:
+        text = "".join(self.chunks)
+        return [{"choices": [{"tokens": [text]}], "usage": {"input": 0, "output": len(self.chunks)}}]
+
+    def stream(self) -> list:
+        elapsed = time.monotonic() - self.created
+        available = len(self.chunks) if self.ready() else int(len(self.chunks) * elapsed / self.latency) if self.latency else len(self.chunks)
+        chunks = self.chunks[self.streamed:available]
+        self.streamed = max(self.streamed, available)
+        return [{"output": {"choices": [{"tokens": [chunk]}]}} for chunk in chunks]
+
+
+class StubRunPod:
+    def __init__(self, text: str = STUB_NARRATIVE, latency: float = 0.5, cold_start: float = 0.0, fail_rate: float = 0.0, chunk_size: int = 16, runsync_wait: float = 90.0, assistant_latency: float = 0.2):
+        self.text = text
+        self.latency = latency
+        self.assistant_latency = assistant_latency
+        self.cold_start = cold_start
+        self.fail_rate = fail_rate
+        self.chunk_size = chunk_size
+        self.runsync_wait = runsync_wait
+        self.jobs = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.random = random.Random(0)
+
+    def submit(self) -> str:
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            latency = self.latency + self.cold_start
+            self.cold_start = 0.0
+            self.jobs[job_id] = StubJob(self.text, latency, self.chunk_size)
+        return job_id
+
+    def status(self, job_id: str) -> dict:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return {"id": job_id, "status": "FAILED", "error": "unknown job"}
+        if not job.ready():
+            return {"id": job_id, "status": "IN_PROGRESS"}
+        return {"id": job_id, "status": "COMPLETED", "output": job.output()}
+
+    def completion(self, request: dict) -> dict:
+        time.sleep(self.assistant_latency)
+        if request.get("response_format"):
+            content = json.dumps(STUB_STRUCTURED)
+        else:
+            content = STUB_CHAPTER
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def reply(self, code: int, body: dict):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def route(self, method: str):
+                with stub.lock:
+                    stub.requests += 1
+                    failed = stub.random.random() < stub.fail_rate
+                if failed:
+                    return self.reply(503, {"error": "stub failure"})
+
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+
+                parts = self.path.strip("/").split("/")
+                if method == "POST" and parts[-2:] == ["chat", "completions"]:
+                    return self.reply(200, stub.completion(json.loads(body or b"{}")))
+                action, job_id = parts[2] if len(parts) > 2 else "", parts[3] if len(parts) > 3 else ""
+                if method == "POST" and action == "run":
+                    return self.reply(200, {"id": stub.submit(), "status": "IN_QUEUE"})
+                if method == "POST" and action == "runsync":
+                    job_id = stub.submit()
+                    deadline = time.monotonic() + stub.runsync_wait
+                    while not stub.jobs[job_id].ready() and time.monotonic() < deadline:
+                        time.sleep(0.01)
+                    return self.reply(200, stub.status(job_id))
+                if method == "GET" and action == "status":
+                    return self.reply(200, stub.status(job_id))
+                if method == "GET" and action == "stream":
+                    job = stub.jobs.get(job_id)
+                    if job is None:
+                        return self.reply(404, {"error": "unknown job"})
+                    return self.reply(200, {"status": "COMPLETED" if job.ready() and job.streamed == len(job.chunks) else "IN_PROGRESS", "stream": job.stream()})
+                if method == "POST" and action == "cancel":
+                    stub.jobs.pop(job_id, None)
+                    return self.reply(200, {"id": job_id, "status": "CANCELLED"})
+                return self.reply(404, {"error": f"unknown route {self.path}"})
+
+            def do_GET(self):
+                self.route("GET")
+
+            def do_POST(self):
+                self.route("POST")
+
+        return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 0, **options):
+    stub = StubRunPod(**options)
+    server = ThreadingHTTPServer((host, port), stub.handler())
+    server.stub = stub
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub RunPod vLLM endpoint for local testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before a job completes")
+    parser.add_argument("--cold-start", type=float, default=0.0, help="Extra seconds added to the first job")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--assistant-latency", type=float, default=0.2, help="Seconds the OpenAI-compatible /v1/chat/completions route takes")
+    parser.add_argument("--runsync-wait", type=float, default=90.0, help="Seconds /runsync waits before returning IN_PROGRESS")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, latency=args.latency, cold_start=args.cold_start, fail_rate=args.fail_rate, runsync_wait=args.runsync_wait, assistant_latency=args.assistant_latency)
+    print(f"Stub RunPod listening on http://{args.host}:{server.server_port} (set runpod_base_url to http://{args.host}:{server.server_port}/v2 and OPENAI_BASE_URL to http://{args.host}:{server.server_port}/v1)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import io
+import json
+import time
+import base64
+import random
+import argparse
+import threading
+import tracemalloc
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from ..inference.tiles import TileProcessor
+from .turns import summarize
+
+
+def synthetic_tile(seed: int) -> str:
+    rng = random.Random(seed)
+    blocks = Image.frombytes("RGB", (64, 64), bytes(rng.randrange(256) for _ in range(64 * 64 * 3)))
+    noise = Image.frombytes("RGB", (1024, 1024), rng.randbytes(1024 * 1024 * 3))
+    image = Image.blend(blocks.resize((1024, 1024), Image.Resampling.NEAREST), noise, 0.15)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def legacy_tile(b64_json: str) -> dict:
+    image_bytes = base64.b64decode(b64_json)
+    image = Image.open(io.BytesIO(image_bytes))
+    resized_image = image.resize((128, 128), Image.Resampling.LANCZOS)
+    tile_bytes = io.BytesIO()
+    resized_image.save(tile_bytes, format="PNG")
+    return {"thumbnail": tile_bytes.getvalue()}
+
+
+class Ticker:
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stalls = []
+        self.running = False
+
+    def __enter__(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.tick, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.running = False
+        self.thread.join()
+
+    def tick(self):
+        while self.running:
+            started = time.perf_counter()
+            time.sleep(self.interval)
+            self.stalls.append(time.perf_counter() - started - self.interval)
+
+
+def measure(name: str, process, b64_json: str, tiles: int, concurrency: int) -> dict:
+    process(b64_json)
+    tracemalloc.start()
+    process(b64_json)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples = []
+
+    def timed(_):
+        started = time.perf_counter()
+        variants = process(b64_json)
+        samples.append(time.perf_counter() - started)
+        return variants
+
+    with Ticker() as ticker, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = time.perf_counter()
+        variants = list(executor.map(timed, range(tiles)))[-1]
+        elapsed = time.perf_counter() - started
+
+    return {
+        "mode": name,
+        "tile": summarize(samples),
+        "tiles_per_second": tiles / elapsed,
+        "caller_peak_kb": peak / 1024,
+        "caller_stall": summarize(ticker.stalls),
+        "bytes": {label: len(data) for label, data in variants.items()},
+    }
+
+
+def run(args) -> dict:
+    b64_json = synthetic_tile(args.seed)
+    results = [measure("legacy", legacy_tile, b64_json, args.tiles, args.concurrency)]
+    for format in args.formats:
+        for workers in (0, args.workers):
+            config = SimpleNamespace(
+                tile_format=format,
+                tile_quality=args.quality,
+                tile_thumbnail_size=128,
+                tile_full_size=args.full_size,
+                tile_workers=workers,
+            )
+            name = f"{format}-{'pool' if workers else 'inline'}"
+            results.append(measure(name, TileProcessor(config).process, b64_json, args.tiles, args.concurrency))
+    return {"source_bytes": len(b64_json) * 3 // 4, "tiles": args.tiles, "concurrency": args.concurrency, "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark DUNGEN! map tile post-processing")
+    parser.add_argument("--tiles", type=int, default=20, help="Tiles to process per mode")
+    parser.add_argument("--concurrency", type=int, default=2, help="Tiles processed at the same time, e.g. several players")
+    parser.add_argument("--workers", type=int, default=2, help="Process pool size for the pool modes")
+    parser.add_argument("--formats", nargs="+", default=["png", "webp"], choices=["png", "webp"])
+    parser.add_argument("--quality", type=int, default=80, help="WebP quality")
+    parser.add_argument("--full-size", type=int, default=512, help="Full-size variant, 0 for thumbnails only")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+import io
+import os
+import json
+import time
+import yaml
+import base64
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import tracemalloc
+from types import SimpleNamespace
+from rich.console import Console
+from .stub_runpod import STUB_NARRATIVE
+
+REACTIONS = [
+    "Draw your sword and step forward",
+    "Try to talk to the goblin",
+    "Search the room for anything useful",
+    "Drink a healing potion",
+    "Back away into the corridor",
+]
+NPCS = ["Goblin Warrior", "Hooded Merchant", "Skeleton Guard", "", ""]
+
+
+class FakeNarrativeEngine:
+    def __init__(self, latency: float, text: str = STUB_NARRATIVE):
+        self.latency = latency
+        self.text = text
+        self.calls = 0
+
+    def reset(self):
+        pass
+
+    def generate(self, input: str, streamer=None) -> str:
+        self.calls += 1
+        time.sleep(self.latency)
+        return self.text
+
+
+class FakeOpenAI:
+    def __init__(self, assistant_latency: float, image_latency: float, seed: int = 0):
+        self.assistant_latency = assistant_latency
+        self.image_latency = image_latency
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self.images = SimpleNamespace(generate=self.generate)
+        self.tile = self.blank_tile()
+
+    @staticmethod
+    def blank_tile() -> str:
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new("RGB", (1024, 1024), (40, 32, 24)).save(buffer, format="PNG")
+        return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    @staticmethod
+    def response(content: str):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def game_status(self) -> dict:
+        with self.lock:
+            self.calls += 1
+            turn = self.calls
+            npc = self.random.choice(NPCS)
+        return {
+            "player_health_change": -5 if turn % 2 else 5,
+            "player_stamina_change": -10 if turn % 2 else 10,
+            "inventory_update": ["sword", "torch", f"trinket {turn % 3}"],
+            "npc": npc,
+            "npc_health": 25 if npc else None,
+            "dialog": "You'll never escape alive!" if npc else "",
+        }
+
+    def create(self, model=None, messages=None, response_format=None, **kwargs):
+        time.sleep(self.assistant_latency)
+        if response_format and response_format.get("type") == "json_object":
+            return self.response(json.dumps({"edits": [{"row": -1, "col": 0, "tile": "P"}]}))
+        if response_format:
+            return self.response(json.dumps({
+                "narrative": STUB_NARRATIVE.split("</narrative>")[0].replace("<narrative>", ""),
+                "next_reaction": REACTIONS[:3],
+                "game_status": self.game_status(),
+            }))
+        if "Summarize" in messages[-1]["content"]:
+            return self.response("The hero fought goblins, bargained with a merchant and pressed deeper into the dungeon.")
+        return self.response("   0  1\n0 [P][ ]\n1    [E]")
+
+    def generate(self, model=None, prompt=None, n=1, size=None, **kwargs):
+        time.sleep(self.image_latency)
+        return SimpleNamespace(data=[SimpleNamespace(b64_json=self.tile)])
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def wrap(self, stage: str, target, name: str):
+        method = getattr(target, name)
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+
+        setattr(target, name, timed)
+
+    def record(self, stage: str, seconds: float):
+        with self.lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def report(self) -> dict:
+        return {stage: summarize(samples) for stage, samples in self.samples.items()}
+
+
+def percentile(samples: list, fraction: float) -> float:
+    index = min(len(samples) - 1, max(0, round(fraction * (len(samples) - 1))))
+    return samples[index]
+
+
+def summarize(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "mean_ms": 1000 * sum(samples) / len(samples),
+        "p50_ms": 1000 * percentile(samples, 0.5),
+        "p90_ms": 1000 * percentile(samples, 0.9),
+        "p99_ms": 1000 * percentile(samples, 0.99),
+        "max_ms": 1000 * samples[-1],
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def prepare_configs(args, workdir: str):
+    with open(args.inference) as config_file:
+        model_parameters = yaml.safe_load(config_file) or {}
+    model_parameters["response_cache"] = args.cache
+    model_parameters["response_cache_path"] = os.path.join(workdir, "responses.db")
+    model_parameters["local_engine"] = "batch" if args.speculate else "cache"
+    model_parameters["speculation"] = args.speculate
+    model_parameters["map_backend"] = args.map_backend
+    if args.context_window is not None:
+        model_parameters["context_window"] = args.context_window
+
+    inference_path = os.path.join(workdir, "config.yaml")
+    with open(inference_path, "w") as config_file:
+        yaml.safe_dump(model_parameters, config_file)
+    settings_path = os.path.join(workdir, os.path.basename(args.settings))
+    shutil.copy(args.settings, settings_path)
+    return inference_path, settings_path
+
+
+def run(args) -> dict:
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    from ..game import Game, TileStore
+    from ..game.snapshot import Snapshot
+
+    workdir = tempfile.mkdtemp(prefix="dungen-bench-")
+    output = open(os.devnull, "w")
+    try:
+        inference_path, settings_path = prepare_configs(args, workdir)
+        client = FakeOpenAI(args.assistant_latency / 1000, args.image_latency / 1000, args.seed)
+        engine = FakeNarrativeEngine(args.narrative_latency / 1000)
+        game = Game(
+            inference_config_path=inference_path,
+            game_settings_path=settings_path,
+            map_generation=args.mapgen != "none",
+            webui=args.mapgen == "tile",
+            console=Console(file=output, width=100),
+            tile_store=TileStore(os.path.join(workdir, "tiles")),
+            client=client,
+            snapshot_path=os.path.join(workdir, "bench.save"),
+        )
+        game.narrative_generation._device_engine = engine
+
+        timer = StageTimer()
+        timer.wrap("turn_context", game.logic, "turn_context")
+        timer.wrap("prompt_assembly", game.narrative_generation, "prepare_input")
+        timer.wrap("generate_narrative", game, "generate_narrative")
+        timer.wrap("structured_response", game.structured_response, "structured_response")
+        timer.wrap("parse_response", game.logic, "parse_response")
+        timer.wrap("apply_metadata", game.logic, "apply_metadata")
+        timer.wrap("summarize_chapter", game.summarize_chapter, "summarize_chapter")
+        timer.wrap("update_map", game.generate_map, "update_map")
+        timer.wrap("update_map", game.generate_map, "update_procedural")
+        timer.wrap("update_map", game.generate_map, "update_delta")
+        timer.wrap("play_turn", game, "play_turn")
+        timer.wrap("checkpoint", game, "checkpoint")
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        game.intro()
+        timer.record("intro", time.perf_counter() - started)
+        baseline = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+
+        turns_started = time.perf_counter()
+        for turn in range(args.turns):
+            game.state.player.health = max(game.state.player.health, 50)
+            time.sleep(args.think_time / 1000)
+            game.react(REACTIONS[turn % len(REACTIONS)])
+        game.logic.join_map(game.console, game.panels)
+        game.apply_summary()
+        elapsed = time.perf_counter() - turns_started
+
+        started = time.perf_counter()
+        Snapshot(game.snapshot.path).load(game.state)
+        timer.record("snapshot_load", time.perf_counter() - started)
+
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().compare_to(baseline, "lineno")[:args.top_allocations]
+        tracemalloc.stop()
+
+        report = {
+            "commit": git_commit(),
+            "turns": args.turns,
+            "mapgen": args.mapgen,
+            "map_backend": args.map_backend,
+            "cache": args.cache,
+            "latency_ms": {
+                "narrative": args.narrative_latency,
+                "assistant": args.assistant_latency,
+                "image": args.image_latency,
+            },
+            "wall_seconds": elapsed,
+            "turns_per_second": args.turns / elapsed if elapsed else None,
+            "stages": timer.report(),
+            "memory": {
+                "current_kb": current / 1024,
+                "peak_kb": peak / 1024,
+                "top_allocations": [
+                    {"site": str(stat.traceback[0]), "size_diff_kb": stat.size_diff / 1024, "count_diff": stat.count_diff}
+                    for stat in top
+                ],
+            },
+            "chapters": game.state.chapter_index - 1,
+            "prompt_tokens": game.state.prompt.tokens,
+            "response_cache": game.response_cache.stats(),
+            "speculation": game.speculator.stats() if args.speculate else None,
+        }
+        game.shutdown()
+        return report
+    finally:
+        output.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="dungen bench", description="Benchmark the DUNGEN! turn loop against fake backends")
+    parser.add_argument("--inference", default="config.yaml", help="Path to model configuration YAML file")
+    parser.add_argument("--settings", default="fantasy.yaml", help="Path to game configuration YAML file")
+    parser.add_argument("--turns", type=int, default=50, help="Scripted turns to play")
+    parser.add_argument("--narrative-latency", type=float, default=0.0, help="Simulated narrative model latency (ms)")
+    parser.add_argument("--assistant-latency", type=float, default=0.0, help="Simulated assistant model latency (ms)")
+    parser.add_argument("--image-latency", type=float, default=0.0, help="Simulated image model latency (ms)")
+    parser.add_argument("--mapgen", default="none", choices=["none", "ascii", "tile"], help="Include ASCII or tile map generation")
+    parser.add_argument("--map-backend", default="openai", choices=["openai", "procedural"], help="Map generation backend")
+    parser.add_argument("--cache", action="store_true", help="Enable the response cache")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Simulated player reading time between turns (ms)")
+    parser.add_argument("--speculate", action="store_true", help="Pre-generate the suggested next reactions")
+    parser.add_argument("--context-window", type=int, help="Override context_window, e.g. 2048 to exercise chapter summaries")
+    parser.add_argument("--top-allocations", type=int, default=5, help="Allocation sites to report")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import sqlite3
+from contextlib import contextmanager
+
+BUSY_TIMEOUT = 30
+
+
+def connect(path: str, timeout: float = BUSY_TIMEOUT):
+    connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+    connection.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+@contextmanager
+def immediate(connection):
+    connection.execute("BEGIN IMMEDIATE")
+    with connection:
+        yield connection
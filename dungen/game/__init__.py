@@ -1,3 +1,4 @@
 from .core import Game
+from .tiles import TileStore
 
-__all__ = ['Game']
\ No newline at end of file
+__all__ = ['Game', 'TileStore']
\ No newline at end of file
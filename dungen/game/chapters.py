@@ -0,0 +1,72 @@
+import os
+import threading
+from ..tracing import tracer
+from ..database import connect
+
+
+def chapter_paths(game_settings_path: str = None):
+    base = os.path.splitext(game_settings_path)[0] if game_settings_path else "game"
+    return base + ".db", base + ".parquet"
+
+
+class ChapterStore:
+    def __init__(self, path: str, legacy_path: str = None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = connect(path)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS chapters (id INTEGER PRIMARY KEY AUTOINCREMENT, chapter INTEGER NOT NULL, summary TEXT NOT NULL)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS chapters_chapter ON chapters (chapter)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+
+        if legacy_path and os.path.exists(legacy_path) and self.get_meta("migrated_from") is None:
+            self.migrate_parquet(legacy_path)
+
+    def get_meta(self, key: str, default=None):
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def append(self, summary: str) -> int:
+        with tracer.span("chapter.save") as span, self.lock, self.connection:
+            chapter = self.connection.execute(
+                "INSERT INTO chapters (chapter, summary) SELECT COALESCE(MAX(chapter), 0) + 1, ? FROM chapters RETURNING chapter",
+                (summary,),
+            ).fetchone()[0]
+            span.set("chapter", chapter)
+        return chapter
+
+    def count(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM chapters").fetchone()[0]
+
+    def last(self):
+        with self.lock:
+            row = self.connection.execute("SELECT summary FROM chapters ORDER BY id DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def chapters(self):
+        with self.lock:
+            return self.connection.execute("SELECT chapter, summary FROM chapters ORDER BY id").fetchall()
+
+    def migrate_parquet(self, legacy_path: str) -> int:
+        import pandas as pd
+
+        dataframe = pd.read_parquet(legacy_path)
+        rows = [(int(row["chapter"]), str(row["summary"])) for _, row in dataframe.iterrows()]
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT INTO chapters (chapter, summary) VALUES (?, ?)", rows)
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from', ?)", (os.path.abspath(legacy_path),))
+        return len(rows)
+
+    def compact(self) -> None:
+        with self.lock:
+            self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.connection.execute("VACUUM")
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
@@ -1,45 +1,83 @@
 import os
+from collections import deque
 from openai import OpenAI
 from rich.console import Console
 
 from ..models import Config
 from ..ui import Panels
-from ..inference import NarrativeGeneration, StructuredResponse, SummarizeChapter, GenerateMap
+from ..inference import NarrativeGeneration, StructuredResponse, SummarizeChapter, GenerateMap, ResponseCache, GuidedResponse
 from .state import GameState
 from .logic import GameLogic
 from .narrative import NarrativeManager
+from .tiles import TileStore
+from .speculation import Speculator
+from .snapshot import Snapshot
+from ..tracing import tracer, format_spans
 
 
 class Game:
-    def __init__(self, inference_config_path: str = "config.yaml", game_settings_path: str = None, remote_inference: bool = False, map_generation: bool = False, webui: bool = False) -> None:
+    def __init__(self, inference_config_path: str = "config.yaml", game_settings_path: str = None, remote_inference: bool = False, map_generation: bool = False, webui: bool = False, stream: bool = False, console: Console = None, panels: Panels = None, tile_store: TileStore = None, client=None, profile: bool = False, trace_path: str = None, resume: bool = False, snapshot_path: str = None, local_engine: str = None, chapter_path: str = None) -> None:
         self.config = Config(inference_config_path, game_settings_path)
+        if local_engine:
+            self.config.local_engine = local_engine
         self.map_generation = map_generation
         self.webui = webui
+        self.stream = stream
+        self.profile = profile
+        self.resume = resume
+        self.traces = deque(maxlen=4)
+        tracer.configure(trace_path, profile)
 
-        self.console = Console()
-        self.panels = Panels(self.config)
+        self.console = console or Console()
+        self.panels = panels or Panels(self.config)
         
         self.remote_inference = remote_inference
         self.request_key = os.getenv("REQUEST_KEY")
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = client or OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-        self.state = GameState(self.config, game_settings_path)
+        encounter_path = os.path.splitext(snapshot_path)[0] + ".encounters.db" if snapshot_path else None
+        self.state = GameState(self.config, game_settings_path, encounter_path, os.path.abspath(snapshot_path) if snapshot_path else None, chapter_path)
         self.logic = GameLogic(self.state)
         self.narrative_manager = NarrativeManager(self.state)
+        self.snapshot = Snapshot(snapshot_path, self.config.snapshot_compact_every) if snapshot_path else None
 
         self.narrative_generation = NarrativeGeneration(self.config, self.client, self.request_key, self.remote_inference)
-        self.structured_response = StructuredResponse(self.config, self.client)
-        self.summarize_chapter = SummarizeChapter(self.config, self.client)
-        self.generate_map = GenerateMap(self.config, self.client)
+        self.response_cache = ResponseCache(self.config)
+        self.structured_response = StructuredResponse(self.config, self.client, self.response_cache)
+        if self.config.structured_backend == "guided":
+            self.structured_response = GuidedResponse(self.config, self.narrative_generation, self.structured_response, self.response_cache)
+        self.speculator = Speculator(self.config, self.narrative_generation, self.structured_response, self.state.token_counter, self.remote_inference or self.config.local_engine == "batch")
+        if self.speculator.enabled:
+            self.structured_response = self.speculator
+        self.summarize_chapter = SummarizeChapter(self.config, self.client, self.response_cache)
+        self.tile_store = tile_store or TileStore(os.path.join("assets", "mini-map"))
+        self.generate_map = GenerateMap(self.config, self.client, self.tile_store, self.response_cache)
+        if self.webui and self.map_generation:
+            self.generate_map.tile_processor.warm()
+
+    def apply_summary(self, timeout=None):
+        summary = self.narrative_manager.join_summary(timeout)
+        if summary:
+            self.console.print(self.panels.render_response_panel("CHAPTER", summary))
+            self.narrative_generation.reset_cache()
 
     def generate_narrative(self, input: str) -> str:
-        content = self.narrative_generation.generate_narrative(input, self.state.messages, self.console, self.panels)
+        self.apply_summary(None if self.narrative_manager.overflows() else self.config.summary_wait_timeout)
+
+        content = self.speculator.take(self.state.prompt, input)
+        if self.speculator.enabled:
+            tracer.current().set("speculation_hit", content is not None)
+        if content is not None:
+            self.state.prompt.append("user", input)
+            self.state.prompt.append("assistant", content)
+        elif self.stream:
+            deltas = self.narrative_generation.stream_narrative(input, self.state.prompt, self.console, self.panels)
+            content = self.panels.stream_response_panel(self.console, "DUNGEN MASTER", deltas)
+        else:
+            content = self.narrative_generation.generate_narrative(input, self.state.prompt, self.console, self.panels)
         
-        if self.narrative_manager.summary_check():
-            summary = self.summarize_chapter.summarize_chapter(self.state.messages)
-            self.narrative_manager.save_chapter(summary)
-            self.console.print(self.panels.render_response_panel("CHAPTER", summary))
-            self.narrative_manager.reset_messages_list(summary)
+        if self.narrative_manager.pending_summary is None and self.narrative_manager.summary_check():
+            self.narrative_manager.submit_summary(self.summarize_chapter)
         return content
 
     def play_turn(self, input: str):
@@ -54,7 +92,7 @@ class Game:
             self.panels
         )
 
-    def start(self):
+    def intro(self):
         if self.webui and self.map_generation:
             model_info = f"{self.config.narrative_model} (Dungen Master) | {self.config.assistant_model} (Assistant) | {self.config.image_model} (MapGen)"
         elif self.map_generation:
@@ -83,40 +121,94 @@ class Game:
         if self.state.last_chapter:
             self.console.print(self.panels.render_response_panel("ONCE UPON A TIME...", self.state.last_chapter))
 
-        starting_input = self.logic.turn_context("So it begins...")
-        intro_content = self.generate_narrative(starting_input)
-        intro_json = self.structured_response.structured_response(intro_content)
-        narrative, meta = self.logic.parse_response(intro_json)
+        self.state.encounter_log.clear()
+        self.state.memory.forget_dialog()
+        with tracer.span("intro") as span:
+            starting_input = self.logic.turn_context("So it begins...")
+            intro_content = self.generate_narrative(starting_input)
+            intro_json = self.structured_response.structured_response(intro_content)
+            with tracer.span("metadata.apply"):
+                narrative, meta = self.logic.parse_response(intro_json)
+                self.logic.apply_metadata(meta)
+
+            self.console.print(self.panels.render_response_panel("DUNGEN MASTER", narrative))
+
+            character_info = f"{self.state.player.health} HP | {self.state.player.stamina} STA"
+            self.console.print(self.panels.render_char_panel("CHARACTER", character_info))
+
+            if self.map_generation:
+                self.logic.submit_map(narrative, self.generate_map, self.webui, self.console, self.panels, meta)
+            self.checkpoint()
+            self.speculate()
+        self.print_profile(span)
 
-        self.console.print(self.panels.render_response_panel("DUNGEN MASTER", narrative))
-        self.logic.apply_metadata(meta)
+    def checkpoint(self):
+        if self.snapshot is None:
+            return
+        if self.state.check_player_status():
+            self.snapshot.checkpoint(self.state)
+        elif os.path.exists(self.snapshot.path):
+            os.remove(self.snapshot.path)
 
+    def resume_game(self) -> bool:
+        if self.snapshot is None or not self.snapshot.load(self.state):
+            return False
+        self.state.memory.forget_dialog(after=self.state.turn)
+        self.console.print(self.panels.render_info_panel("DUNGEN MASTER", f"Welcome back, adventurer! Resuming turn {self.state.turn}..."))
         character_info = f"{self.state.player.health} HP | {self.state.player.stamina} STA"
         self.console.print(self.panels.render_char_panel("CHARACTER", character_info))
+        if self.state.current_map and not self.webui:
+            self.console.print(self.panels.render_map_panel("MAP", self.state.current_map))
+        return True
 
-        if self.webui:
-            map_input = f"Narrative: {narrative}"
-        elif self.state.current_map:
-            map_input = f"Narrative: {narrative}\n\nCurrent Map:\n{self.state.current_map}"
-        else:
-            map_input = f"Narrative: {narrative}"
-        
-        if self.map_generation:
-            if self.webui:
-                self.generate_map.update_map(map_input, self.webui, self.map_generation, self.state.turn, self.console, self.panels)
-            else:
-                updated_map = self.generate_map.update_map(map_input, self.webui, self.map_generation, self.state.turn, self.console, self.panels)
-                self.console.print(self.panels.render_map_panel("MAP", updated_map))
-                self.state.update_map(updated_map)
+    def speculate(self):
+        if self.narrative_manager.pending_summary is None and self.state.check_player_status():
+            self.speculator.speculate(self.logic.next_reactions, self.state.prompt, self.logic.turn_context)
+
+    def print_profile(self, span):
+        if not self.profile:
+            return
+        self.traces.append(span.trace_id)
+        spans = [item for trace_id in self.traces for item in tracer.drain(trace_id)]
+        if spans:
+            self.console.print(self.panels.render_profile_panel(f"PROFILE TURN {self.state.turn}", format_spans(spans)))
 
+    def react(self, action: str) -> bool:
+        self.state.increment_turn()
+        if action.lower().strip() in {"quit", "exit", "run away"}:
+            self.console.print(self.panels.render_info_panel("DUNGEN MASTER", "Farewell and til next time, adventurer!"))
+            return False
+        action = self.speculator.canonical(action)
+        with tracer.span("turn", turn=self.state.turn) as span:
+            playing = self.play_turn(action)
+            self.checkpoint()
+            if playing:
+                self.speculate()
+        self.print_profile(span)
+        return playing
+
+    def start(self):
+        if not (self.resume and self.resume_game()):
+            self.intro()
         while self.state.check_player_status():
-            self.state.increment_turn()
             if self.webui:
                 action = input()
             else:
+                self.logic.join_map(self.console, self.panels, self.config.map_wait_timeout)
                 action = self.console.input("\nREACT! >>>  ")
-            if action.lower().strip() in {"quit", "exit", "run away"}:
-                self.console.print(self.panels.render_info_panel("DUNGEN MASTER", "Farewell and til next time, adventurer!"))
+            if not self.react(action):
                 break
-            if not self.play_turn(action):
-                break
\ No newline at end of file
+        self.shutdown()
+
+    def shutdown(self):
+        self.logic.shutdown()
+        self.speculator.shutdown()
+        self.narrative_manager.shutdown(self.close_stores)
+
+    def close_stores(self):
+        self.state.encounter_log.close()
+        if self.snapshot is None:
+            self.state.memory.forget_dialog()
+        self.state.memory.close()
+        self.state.chapters.close()
+        self.response_cache.close()
\ No newline at end of file
@@ -0,0 +1,129 @@
+import os
+import re
+import tempfile
+import threading
+from functools import lru_cache
+from itertools import islice
+from collections import OrderedDict, deque
+from ..models import EncounterEntry
+from ..database import connect
+
+
+def npc_key(npc: str) -> str:
+    return " ".join(str(npc or "").casefold().split())
+
+
+@lru_cache(maxsize=1024)
+def npc_pattern(key: str):
+    return re.compile(rf"(?<!\w){re.escape(key)}(?!\w)")
+
+
+class EncounterLog:
+    def __init__(self, path: str = None, memory_limit: int = 256, index_limit: int = 256):
+        self.recent_entries = deque(maxlen=memory_limit)
+        self.index = OrderedDict()
+        self.index_limit = index_limit
+        self.total = 0
+        self.lock = threading.Lock()
+        self.temporary = path is None
+        if path is None:
+            descriptor, path = tempfile.mkstemp(prefix="dungen-encounters-", suffix=".db")
+            os.close(descriptor)
+        self.path = path
+        self.connection = connect(path)
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS encounters (turn INTEGER, npc TEXT, npc_key TEXT, npc_health INTEGER, damage INTEGER, dialog TEXT)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS encounters_npc ON encounters (npc_key, turn)")
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __iter__(self):
+        return iter(self.recent_entries)
+
+    def append(self, entry: EncounterEntry) -> None:
+        with self.lock:
+            if len(self.recent_entries) == self.recent_entries.maxlen:
+                self.spill(self.recent_entries[0])
+            self.recent_entries.append(entry)
+            self.total += 1
+            key = npc_key(entry.npc)
+            if key:
+                self.index[key] = entry
+                self.index.move_to_end(key)
+                if len(self.index) > self.index_limit:
+                    self.index.popitem(last=False)
+
+    def spill(self, entry: EncounterEntry) -> None:
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO encounters VALUES (?, ?, ?, ?, ?, ?)",
+                (entry.turn, entry.npc, npc_key(entry.npc), entry.npc_health, entry.damage, entry.dialog),
+            )
+
+    def recent(self, limit: int) -> list:
+        return list(islice(reversed(self.recent_entries), max(0, limit)))[::-1]
+
+    def since(self, total: int) -> list:
+        return self.recent(self.total - total)
+
+    def history(self, npc: str, limit: int = 5, before: int = None) -> list:
+        key = npc_key(npc)
+        before = 2 ** 62 if before is None else before
+        entries = [entry for entry in reversed(self.recent_entries) if npc_key(entry.npc) == key and entry.turn < before][:limit]
+        if len(entries) < limit:
+            rows = self.connection.execute(
+                "SELECT turn, npc, npc_health, damage, dialog FROM encounters WHERE npc_key = ? AND turn < ? ORDER BY turn DESC LIMIT ?",
+                (key, before, limit - len(entries)),
+            ).fetchall()
+            entries.extend(EncounterEntry(*row) for row in rows)
+        return entries
+
+    def last_met(self, npc: str, before: int = None):
+        key = npc_key(npc)
+        entry = self.index.get(key)
+        if entry is not None and (before is None or entry.turn < before):
+            return entry
+        entries = self.history(npc, 1, before)
+        return entries[0] if entries else None
+
+    def mentioned(self, text: str) -> list:
+        text = npc_key(text)
+        return [entry.npc for key, entry in reversed(self.index.items()) if key and npc_pattern(key).search(text)]
+
+    def restore(self, entries, total: int = None) -> None:
+        with self.lock:
+            self.recent_entries.clear()
+            self.index.clear()
+            self.recent_entries.extend(entries)
+            self.total = len(self.recent_entries) if total is None else total
+            with self.connection:
+                if self.recent_entries:
+                    self.connection.execute("DELETE FROM encounters WHERE turn >= ?", (self.recent_entries[0].turn,))
+            rows = self.connection.execute(
+                "SELECT turn, npc, npc_health, damage, dialog FROM encounters AS spilled "
+                "WHERE turn = (SELECT MAX(turn) FROM encounters WHERE npc_key = spilled.npc_key) ORDER BY turn DESC LIMIT ?",
+                (self.index_limit,),
+            ).fetchall()
+            for entry in [EncounterEntry(*row) for row in reversed(rows)] + list(self.recent_entries):
+                key = npc_key(entry.npc)
+                if key:
+                    self.index[key] = entry
+                    self.index.move_to_end(key)
+            while len(self.index) > self.index_limit:
+                self.index.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.recent_entries.clear()
+            self.index.clear()
+            self.total = 0
+            with self.connection:
+                self.connection.execute("DELETE FROM encounters")
+
+    def close(self) -> None:
+        self.connection.close()
+        if self.temporary:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
@@ -1,18 +1,60 @@
 import json
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from ..models import EncounterEntry
+from ..tracing import tracer
+
+
+class QueuedConsole:
+    def __init__(self):
+        self.queue = []
+        self.lock = threading.Lock()
+
+    def print(self, *objects, **kwargs):
+        with self.lock:
+            self.queue.append((objects, kwargs))
+
+    def replay(self, console):
+        with self.lock:
+            queue, self.queue = self.queue, []
+        for objects, kwargs in queue:
+            console.print(*objects, **kwargs)
 
 
 class GameLogic:
     def __init__(self, game_state):
         self.game_state = game_state
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mapgen")
+        self.pending_map = None
+        self.next_reactions = []
 
     def turn_context(self, input: str) -> str:
         inventory = ", ".join(self.game_state.player.inventory) if self.game_state.player.inventory else "none"
         player_status = (f"Name: {self.game_state.player.name} | {self.game_state.player.health} HP | {self.game_state.player.stamina} STA\n\nInventory:\n{inventory}")
+        encounter_log = self.game_state.encounter_log
+        recent = encounter_log.recent(self.game_state.config.recent_encounters_limit)
         encounter_logs = [
-            f"On turn {e.turn}, an NPC named {e.npc} said '{e.dialog}'" for e in self.game_state.encounter_log[-self.game_state.config.recent_encounters_limit:]
+            f"On turn {e.turn}, an NPC named {e.npc} said '{e.dialog}'" for e in recent
         ]
         encounters = "\n".join(encounter_logs) if encounter_logs else "none"
+
+        earlier_logs = []
+        for npc in dict.fromkeys([e.npc for e in recent if e.npc] + encounter_log.mentioned(input)):
+            entry = encounter_log.last_met(npc, before=recent[0].turn if recent else None)
+            if entry is not None:
+                earlier_logs.append(f"Last time you met {entry.npc}, on turn {entry.turn}, they said '{entry.dialog}'")
+        if earlier_logs:
+            encounters += "\n\nEarlier Encounters:\n" + "\n".join(earlier_logs)
+
+        memories = self.game_state.memory.search(
+            " ".join([input] + [e.npc for e in recent if e.npc]),
+            before_turn=recent[0].turn if recent else None,
+            before_chapter=self.game_state.chapter_index - 1,
+        )
+        if memories:
+            encounters += "\n\nMemories:\n" + "\n".join(memories)
+
         turn_context = (f"Player Status:\n{player_status}\n\nEncounters:\n{encounters}\n\nPlayer's Reaction: `{input}`")
         return turn_context
 
@@ -21,6 +63,7 @@ class GameLogic:
         narrative = data.get("narrative", "")
         next_reaction = data.get("next_reaction", [])
         game_status = data.get("game_status", {})
+        self.next_reactions = next_reaction if isinstance(next_reaction, list) else []
         
         if next_reaction:
             if isinstance(next_reaction, list):
@@ -83,14 +126,64 @@ class GameLogic:
                 dialog=dialog,
             )
             self.game_state.encounter_log.append(entry)
+            self.game_state.memory.add_dialog(entry.turn, npc, dialog)
+
+    def submit_map(self, narrative: str, generate_map, webui: bool, console, panels, meta=None):
+        self.join_map(console, panels)
+        output = console if webui else QueuedConsole()
+
+        if self.game_state.config.map_backend == "procedural":
+            future = self.executor.submit(contextvars.copy_context().run, generate_map.update_procedural, narrative, meta, self.game_state.map_grid, webui, self.game_state.turn)
+            self.pending_map = (future, webui, output)
+            return
+
+        if not webui and self.game_state.config.map_delta and self.game_state.map_grid.find(self.game_state.map_grid.symbol("Player")):
+            future = self.executor.submit(contextvars.copy_context().run, generate_map.update_delta, narrative, self.game_state.map_grid, self.game_state.turn, output, panels)
+            self.pending_map = (future, webui, output)
+            return
+
+        if webui:
+            map_input = f"Narrative: {narrative}"
+        elif self.game_state.current_map:
+            map_input = f"Narrative: {narrative}\n\nCurrent Map:\n{self.game_state.current_map}"
+        else:
+            map_input = f"Narrative: {narrative}"
+
+        future = self.executor.submit(contextvars.copy_context().run, generate_map.update_map, map_input, webui, True, self.game_state.turn, output, panels)
+        self.pending_map = (future, webui, output)
+
+    def join_map(self, console, panels, timeout=None):
+        if self.pending_map is None:
+            return
+        future, webui, output = self.pending_map
+        try:
+            future.exception(timeout)
+        except TimeoutError:
+            if not webui:
+                output.replay(console)
+            return
+        self.pending_map = None
+
+        updated_map = future.result()
+        if not webui:
+            output.replay(console)
+            self.game_state.update_map(updated_map)
+            console.print(panels.render_map_panel("MAP", self.game_state.current_map, self.game_state.map_grid.changes))
+
+    def shutdown(self):
+        self.pending_map = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
     def play_turn(self, input: str, generate_narrative_callback, structured_response, map_generation, generate_map, webui, console, panels):
+        self.join_map(console, panels)
+
         turn_input = self.turn_context(input)
         content = generate_narrative_callback(turn_input)
         
         json_content = structured_response.structured_response(content)
-        narrative, meta = self.parse_response(json_content)
-        self.apply_metadata(meta)
+        with tracer.span("metadata.apply"):
+            narrative, meta = self.parse_response(json_content)
+            self.apply_metadata(meta)
         console.print(panels.render_response_panel("DUNGEN MASTER", narrative))
         
         status_lines = []
@@ -126,20 +219,8 @@ class GameLogic:
         character_info = f"{self.game_state.player.health} HP | {self.game_state.player.stamina} STA"
         console.print(panels.render_char_panel("CHARACTER", character_info))
 
-        if webui:
-            map_input = f"Narrative: {narrative}"
-        elif self.game_state.current_map:
-            map_input = f"Narrative: {narrative}\n\nCurrent Map:\n{self.game_state.current_map}"
-        else:
-            map_input = f"Narrative: {narrative}"
-        
         if map_generation:
-            if webui:
-                generate_map.update_map(map_input, webui, map_generation, self.game_state.turn, console, panels)
-            else:
-                updated_map = generate_map.update_map(map_input, webui, map_generation, self.game_state.turn, console, panels)
-                console.print(panels.render_map_panel("MAP", updated_map))
-                self.game_state.update_map(updated_map)
+            self.submit_map(narrative, generate_map, webui, console, panels, meta)
         
         if not self.game_state.check_player_status():
             console.print(panels.render_end_panel("DUNGEN MASTER", "muhahahaha... You have perished in the DUNGEN!"))
@@ -0,0 +1,138 @@
+import re
+import secrets
+import threading
+from ..tracing import tracer
+from ..database import connect, immediate
+
+WORD = re.compile(r"\w{3,}")
+STOPWORDS = frozenset(
+    "the and you your for with from that this into onto then them they their there what when where which who will "
+    "have has had was were are not but all any can out off over under try".split()
+)
+
+
+class MemoryIndex:
+    def __init__(self, config, path: str, chapters=None, count_tokens=None, game: str = None):
+        self.enabled = config.memory_retrieval
+        self.top_k = config.memory_top_k
+        self.token_budget = config.memory_token_budget
+        self.path = path
+        self.game = game or secrets.token_hex(8)
+        self.chapters = chapters
+        self.count_tokens = count_tokens or (lambda text: len(text) // 4)
+        self.lock = threading.Lock()
+        self.documents = 0
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            with tracer.span("memory.load"):
+                connection = connect(self.path)
+                with immediate(connection):
+                    connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+                    columns = [row[1] for row in connection.execute("PRAGMA table_info(memories)")]
+                    if columns and "game" not in columns:
+                        connection.execute("DROP TABLE IF EXISTS memories_vocab")
+                        connection.execute("DROP TABLE memories")
+                        connection.execute("DELETE FROM meta WHERE key = 'chapter'")
+                    connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS memories USING fts5(kind UNINDEXED, source UNINDEXED, game UNINDEXED, text, tokenize='porter unicode61')")
+                    connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS memories_vocab USING fts5vocab(memories, 'row')")
+                self.documents = connection.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+                self._connection = connection
+                self.backfill()
+        return self._connection
+
+    def backfill(self) -> None:
+        if self.chapters is None:
+            return
+        chapters = self.chapters.chapters()
+        with immediate(self._connection):
+            row = self._connection.execute("SELECT value FROM meta WHERE key = 'chapter'").fetchone()
+            indexed = row[0] if row else 0
+            rows = [(chapter, summary) for chapter, summary in chapters if chapter > indexed]
+            if rows:
+                self._connection.executemany("INSERT INTO memories (kind, source, text) VALUES ('chapter', ?, ?)", rows)
+                self.documents += len(rows)
+                self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('chapter', ?)", (max(chapter for chapter, _ in rows),))
+
+    def add_chapter(self, chapter: int, summary: str) -> None:
+        if not self.enabled:
+            return
+        with self.lock, immediate(self.connection):
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'chapter'").fetchone()
+            if row and chapter <= row[0]:
+                self.documents -= self.connection.execute("DELETE FROM memories WHERE kind = 'chapter' AND source = ?", (chapter,)).rowcount
+            self.connection.execute("INSERT INTO memories (kind, source, text) VALUES ('chapter', ?, ?)", (chapter, summary))
+            self.documents += 1
+            self.connection.execute(
+                "INSERT INTO meta (key, value) VALUES ('chapter', ?) ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+                (chapter,),
+            )
+
+    def add_dialog(self, turn: int, npc: str, dialog: str) -> None:
+        if not self.enabled or not dialog:
+            return
+        text = f"{npc} said '{dialog}'" if npc else dialog
+        with self.lock, self.connection:
+            self.connection.execute("INSERT INTO memories (kind, source, game, text) VALUES ('dialog', ?, ?, ?)", (turn, self.game, text))
+            self.documents += 1
+
+    def forget_dialog(self, after: int = None) -> None:
+        if not self.enabled:
+            return
+        with self.lock, self.connection:
+            if after is None:
+                cursor = self.connection.execute("DELETE FROM memories WHERE kind = 'dialog' AND game = ?", (self.game,))
+            else:
+                cursor = self.connection.execute("DELETE FROM memories WHERE kind = 'dialog' AND game = ? AND source > ?", (self.game, after))
+            self.documents -= cursor.rowcount
+
+    def match_query(self, text: str) -> str:
+        words = list(dict.fromkeys(word for word in map(str.casefold, WORD.findall(text)) if word not in STOPWORDS))
+        if not words:
+            return ""
+        frequencies = dict(self.connection.execute(
+            f"SELECT term, doc FROM memories_vocab WHERE term IN ({', '.join('?' * len(words))})", words
+        ).fetchall())
+        informative = [word for word in words if frequencies.get(word, 0) * 2 <= self.documents]
+        if not informative:
+            informative = [min(words, key=lambda word: frequencies.get(word, 0))]
+        return " OR ".join(f'"{word}"' for word in informative)
+
+    def search(self, text: str, before_turn: int = None, before_chapter: int = None) -> list:
+        if not self.enabled or self.top_k <= 0:
+            return []
+        with tracer.span("memory.search") as span, self.lock:
+            query = self.match_query(text)
+            if not query:
+                return []
+            rows = self.connection.execute(
+                "SELECT kind, source, snippet(memories, 3, '', '', '...', 48) FROM memories WHERE memories MATCH ?1 AND rowid IN ("
+                "SELECT rowid FROM memories WHERE memories MATCH ?1 "
+                "AND NOT (kind = 'dialog' AND (game != ?5 OR source >= ?2)) AND NOT (kind = 'chapter' AND source >= ?3) ORDER BY rank LIMIT ?4 * 2"
+                ") ORDER BY rank",
+                (query, 2 ** 62 if before_turn is None else before_turn, 2 ** 62 if before_chapter is None else before_chapter, self.top_k, self.game),
+            ).fetchall()
+            snippets = []
+            tokens = 0
+            for kind, source, snippet in rows:
+                if any(snippet in line for line in snippets):
+                    continue
+                line = f"From chapter {source}: {snippet}" if kind == "chapter" else f"On turn {source}, {snippet}"
+                cost = self.count_tokens(line)
+                if tokens + cost > self.token_budget:
+                    break
+                snippets.append(line)
+                tokens += cost
+                if len(snippets) == self.top_k:
+                    break
+            span.set("results", len(snippets))
+            span.set("tokens", tokens)
+        return snippets
+
+    def close(self) -> None:
+        with self.lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -1,29 +1,86 @@
-import os
-import pandas as pd
+import contextvars
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+from ..tracing import tracer
 
 
 class NarrativeManager:
     def __init__(self, game_state):
         self.game_state = game_state
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+        self.pending_summary = None
 
     def save_chapter(self, summary: str) -> None:
-        if os.path.exists(self.game_state.narrative_file):
-            dataframe = pd.read_parquet(self.game_state.narrative_file)
-            dataframe = pd.concat(
-                [dataframe, pd.DataFrame([{"chapter": self.game_state.chapter_index, "summary": summary}])],
-                ignore_index=True,
-            )
-        else:
-            dataframe = pd.DataFrame([{"chapter": self.game_state.chapter_index, "summary": summary}])
-        dataframe.to_parquet(self.game_state.narrative_file, index=False)
-        self.game_state.chapter_index += 1
+        chapter = self.game_state.chapters.append(summary)
+        self.game_state.memory.add_chapter(chapter, summary)
+        self.game_state.chapter_index = chapter + 1
 
     def summary_check(self) -> bool:
-        limit = self.game_state.config.message_history_limit
-        return limit and len(self.game_state.messages) > limit
-
-    def reset_messages_list(self, summary: str):
-        self.game_state.messages = [
-            self.game_state.messages[0],
-            {"role": "system", "content": f"Once upon a time...\n{summary}"},
-        ]
\ No newline at end of file
+        config = self.game_state.config
+        if not config.context_window:
+            limit = config.message_history_limit
+            return limit and len(self.game_state.messages) > limit
+        return self.overflows(turns=2)
+
+    def overflows(self, turns: int = 1) -> bool:
+        config = self.game_state.config
+        prompt = self.game_state.prompt
+        body = prompt.token_counts[prompt.prefix_length:]
+        if not config.context_window or len(body) <= 2:
+            return False
+        next_turn = body[-2] + config.max_tokens
+        return prompt.tokens + turns * next_turn > config.context_window
+
+    def summary_span(self):
+        config = self.game_state.config
+        prompt = self.game_state.prompt
+        if not config.context_window:
+            return len(prompt.messages) - prompt.prefix_length
+
+        target = config.context_window * config.context_summary_ratio
+        body = prompt.token_counts[prompt.prefix_length:]
+        tokens = prompt.tokens
+        count = 0
+        while count < len(body) - 2 and tokens > target:
+            tokens -= body[count]
+            count += 1
+        return count + count % 2
+
+    def messages_to_summarize(self, count=None):
+        prompt = self.game_state.prompt
+        end = len(prompt.messages) if count is None else prompt.prefix_length + count
+        return prompt.messages[:end]
+
+    def reset_messages_list(self, summary: str, count=None):
+        self.game_state.prompt.fold(summary, count)
+
+    def submit_summary(self, summarize_chapter):
+        count = self.summary_span()
+        messages = self.messages_to_summarize(count)
+        future = self.executor.submit(contextvars.copy_context().run, self.summarize, summarize_chapter, messages)
+        self.pending_summary = (future, count)
+
+    def summarize(self, summarize_chapter, messages) -> str:
+        summary = summarize_chapter.summarize_chapter(messages)
+        self.save_chapter(summary)
+        return summary
+
+    def join_summary(self, timeout=None):
+        if self.pending_summary is None:
+            return None
+        future, count = self.pending_summary
+        try:
+            summary = future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            return None
+        self.pending_summary = None
+        self.reset_messages_list(summary, count)
+        return summary
+
+    def shutdown(self, close):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.pending_summary is None:
+            close()
+        else:
+            self.pending_summary[0].add_done_callback(lambda future: close())
+        self.pending_summary = None
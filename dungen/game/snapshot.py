@@ -0,0 +1,107 @@
+import os
+import msgpack
+from ..models import Player, EncounterEntry
+from ..tracing import tracer
+
+SNAPSHOT_VERSION = 2
+
+
+def snapshot_path(game_settings_path: str = None) -> str:
+    base = os.path.splitext(game_settings_path)[0] if game_settings_path else "game"
+    return base + ".save"
+
+
+def pack_record(record) -> list:
+    return [getattr(record, name) for name in record.__slots__]
+
+
+class Snapshot:
+    def __init__(self, path: str, compact_every: int = 50):
+        self.path = path
+        self.compact_every = compact_every
+        self.records = 0
+        self.encounters = 0
+        self.messages = 0
+        self.folds = None
+        self.current_map = None
+
+    def mark(self, state) -> None:
+        self.encounters = state.encounter_log.total
+        self.messages = len(state.prompt.messages)
+        self.folds = state.prompt.folds
+        self.current_map = state.current_map
+
+    def full_record(self, state) -> list:
+        prompt = state.prompt
+        return [
+            "full",
+            SNAPSHOT_VERSION,
+            state.turn,
+            pack_record(state.player),
+            [pack_record(entry) for entry in state.encounter_log],
+            state.encounter_log.total,
+            [[message["role"], message["content"], tokens] for message, tokens in zip(prompt.messages, prompt.token_counts)],
+            prompt.prefix_length,
+            state.current_map,
+        ]
+
+    def turn_record(self, state) -> list:
+        prompt = state.prompt
+        messages = zip(prompt.messages[self.messages:], prompt.token_counts[self.messages:])
+        return [
+            "turn",
+            state.turn,
+            pack_record(state.player),
+            [pack_record(entry) for entry in state.encounter_log.since(self.encounters)],
+            state.encounter_log.total,
+            [[message["role"], message["content"], tokens] for message, tokens in messages],
+            state.current_map != self.current_map,
+            state.current_map,
+        ]
+
+    def save(self, state) -> None:
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as snapshot_file:
+            snapshot_file.write(msgpack.packb(self.full_record(state), use_bin_type=True))
+        os.replace(temporary, self.path)
+        self.records = 1
+        self.mark(state)
+
+    def checkpoint(self, state) -> None:
+        with tracer.span("snapshot.checkpoint", turn=state.turn) as span:
+            if self.folds != state.prompt.folds or self.records >= self.compact_every or not os.path.exists(self.path):
+                span.set("full", True)
+                self.save(state)
+                return
+            with open(self.path, "ab") as snapshot_file:
+                snapshot_file.write(msgpack.packb(self.turn_record(state), use_bin_type=True))
+            self.records += 1
+            self.mark(state)
+
+    def load(self, state) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        with tracer.span("snapshot.load"), open(self.path, "rb") as snapshot_file:
+            records = list(msgpack.Unpacker(snapshot_file, raw=False))
+        if not records or records[0][0] != "full" or records[0][1] != SNAPSHOT_VERSION:
+            return False
+
+        _, _, turn, player, encounters, total, messages, prefix_length, current_map = records[0]
+        for _, turn, player, new_encounters, total, new_messages, map_changed, new_map in records[1:]:
+            encounters.extend(new_encounters)
+            messages.extend(new_messages)
+            if map_changed:
+                current_map = new_map
+
+        state.turn = turn
+        state.player = Player(*player)
+        state.encounter_log.restore([EncounterEntry(*entry) for entry in encounters], total)
+        state.update_map(current_map)
+        state.prompt.restore(
+            [{"role": role, "content": content} for role, content, _ in messages],
+            [tokens for _, _, tokens in messages],
+            prefix_length,
+        )
+        self.records = len(records)
+        self.mark(state)
+        return True
@@ -0,0 +1,126 @@
+import hashlib
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ..models import ChatPrompt
+from ..tracing import tracer
+
+
+def normalize(action: str) -> str:
+    return " ".join(action.casefold().strip(" \t\n.!?*•-").split())
+
+
+class Speculator:
+    def __init__(self, config, narrative_generation, extractor, count_tokens, enabled: bool = True):
+        self.config = config
+        self.narrative_generation = narrative_generation
+        self.extractor = extractor
+        self.count_tokens = count_tokens
+        self.enabled = config.speculation and enabled
+        self.executor = ThreadPoolExecutor(max_workers=max(1, config.speculation_max_reactions), thread_name_prefix="speculate")
+        self.lock = threading.Lock()
+        self.speculations = {}
+        self.reactions = {}
+        self.structured = {}
+        self.launched = 0
+        self.hits = 0
+        self.misses = 0
+        self.cancelled = 0
+        self.reserved_tokens = 0
+        self.spent_tokens = 0
+        self.used_tokens = 0
+
+    @staticmethod
+    def render(prompt, turn_input: str) -> str:
+        return "".join(prompt.segments) + ChatPrompt.render_message("user", turn_input) + "<|im_start|>assistant\n"
+
+    @staticmethod
+    def key(rendered: str) -> str:
+        return hashlib.sha1(rendered.encode("utf-8")).hexdigest()
+
+    def canonical(self, action: str) -> str:
+        return self.reactions.get(normalize(action), action)
+
+    def speculate(self, reactions, prompt, turn_context):
+        self.discard()
+        if not self.enabled:
+            return
+        for reaction in reactions[:self.config.speculation_max_reactions]:
+            if not isinstance(reaction, str) or not reaction.strip():
+                continue
+            with self.lock:
+                if self.spent_tokens + self.reserved_tokens + self.config.max_tokens > self.config.speculation_token_budget:
+                    break
+                self.reserved_tokens += self.config.max_tokens
+            rendered = self.render(prompt, turn_context(reaction))
+            future = self.executor.submit(contextvars.copy_context().run, self.run, rendered)
+            future.add_done_callback(self.settle)
+            self.speculations[self.key(rendered)] = future
+            self.reactions[normalize(reaction)] = reaction
+            with self.lock:
+                self.launched += 1
+
+    def run(self, rendered: str):
+        with tracer.span("speculate"):
+            content = self.narrative_generation.complete(rendered)
+            structured = self.extractor.structured_response(content) if self.config.speculation_structured else None
+        return content, structured
+
+    def settle(self, future):
+        tokens = 0
+        if not future.cancelled() and future.exception() is None:
+            tokens = self.count_tokens(future.result()[0])
+        with self.lock:
+            self.reserved_tokens -= self.config.max_tokens
+            self.spent_tokens += tokens
+
+    def discard(self):
+        cancelled = sum(future.cancel() for future in self.speculations.values())
+        with self.lock:
+            self.cancelled += cancelled
+        self.speculations = {}
+        self.reactions = {}
+        self.structured = {}
+
+    def take(self, prompt, turn_input: str):
+        if not self.speculations:
+            return None
+        future = self.speculations.pop(self.key(self.render(prompt, turn_input)), None)
+        self.discard()
+        try:
+            content, structured = future.result() if future is not None else (None, None)
+        except Exception:
+            content, structured = None, None
+        if content is None:
+            with self.lock:
+                self.misses += 1
+            return None
+
+        tokens = self.count_tokens(content)
+        with self.lock:
+            self.hits += 1
+            self.used_tokens += tokens
+        if structured is not None:
+            self.structured[content] = structured
+        return content
+
+    def structured_response(self, input: str) -> str:
+        structured = self.structured.pop(input, None)
+        return structured if structured is not None else self.extractor.structured_response(input)
+
+    def stats(self) -> dict:
+        with self.lock:
+            turns = self.hits + self.misses
+            return {
+                "launched": self.launched,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / turns if turns else 0.0,
+                "cancelled": self.cancelled,
+                "spent_tokens": self.spent_tokens,
+                "wasted_tokens": self.spent_tokens - self.used_tokens,
+            }
+
+    def shutdown(self):
+        self.discard()
+        self.executor.shutdown(wait=False, cancel_futures=True)
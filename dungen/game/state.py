@@ -1,40 +1,35 @@
 import os
-import pandas as pd
-from typing import List
-from ..models import EncounterEntry
+from ..models import ChatPrompt, MapGrid
+from ..inference.tokens import TokenCounter
+from .chapters import ChapterStore, chapter_paths
+from .encounters import EncounterLog
+from .memory import MemoryIndex
 
 
 class GameState:
-    def __init__(self, config, game_settings_path=None):
+    def __init__(self, config, game_settings_path=None, encounter_path=None, game_id=None, chapter_path=None):
         self.config = config
         self.player = config.player
         self.turn = 0
-        self.encounter_log: List[EncounterEntry] = []
+        self.encounter_log = EncounterLog(encounter_path, config.encounter_memory_limit, config.encounter_index_limit)
         self.current_map = None
+        self.map_grid = MapGrid(config.map_tiles)
 
-        if game_settings_path:
-            self.narrative_file = os.path.splitext(game_settings_path)[0] + ".parquet"
+        if chapter_path:
+            self.narrative_file, legacy_file = chapter_path, None
         else:
-            self.narrative_file = "game.parquet"
-            
-        if os.path.exists(self.narrative_file):
-            dataframe = pd.read_parquet(self.narrative_file)
-            self.chapter_index = len(dataframe) + 1
-            self.last_chapter = dataframe.iloc[-1]["summary"] if not dataframe.empty else None
-        else:
-            self.chapter_index = 1
-            self.last_chapter = None
-
-        self.messages = [
-            {"role": "system", "content": self.config.system_prompt},
-        ]
-        if self.last_chapter:
-            self.messages.append(
-                {
-                    "role": "assistant",
-                    "content": f"Once upon a time...\n{self.last_chapter}",
-                }
-            )
+            self.narrative_file, legacy_file = chapter_paths(game_settings_path)
+        self.chapters = ChapterStore(self.narrative_file, legacy_path=legacy_file)
+        self.chapter_index = self.chapters.count() + 1
+        self.last_chapter = self.chapters.last()
+
+        self.token_counter = TokenCounter(self.config)
+        self.memory = MemoryIndex(self.config, os.path.splitext(self.narrative_file)[0] + ".memory.db", self.chapters, self.token_counter, game_id)
+        self.prompt = ChatPrompt(self.config.system_prompt, self.last_chapter, self.token_counter)
+
+    @property
+    def messages(self):
+        return self.prompt.messages
 
     def increment_turn(self):
         self.turn += 1
@@ -43,4 +38,9 @@ class GameState:
         return self.player.health > 0
 
     def update_map(self, new_map):
-        self.current_map = new_map
\ No newline at end of file
+        if isinstance(new_map, MapGrid):
+            self.map_grid = new_map
+            self.current_map = new_map.to_ascii()
+        else:
+            self.current_map = new_map
+            self.map_grid = MapGrid.from_ascii(new_map, self.config.map_tiles)
\ No newline at end of file
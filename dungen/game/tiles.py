@@ -0,0 +1,81 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+TILE_MIMETYPES = {"png": "image/png", "webp": "image/webp"}
+
+
+class TileStore:
+    def __init__(self, spill_dir: str = None, max_memory_tiles: int = 32):
+        self.spill_dir = spill_dir
+        self.max_memory_tiles = max_memory_tiles
+        self.memory = OrderedDict()
+        self.spilled = {}
+        self.tiles = []
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    @staticmethod
+    def entry(name: str, turn: int, data: bytes, format: str) -> dict:
+        return {
+            "name": name,
+            "turn": turn,
+            "etag": hashlib.sha1(data).hexdigest(),
+            "mimetype": TILE_MIMETYPES.get(format, "application/octet-stream"),
+        }
+
+    def put(self, turn: int, data: bytes, format: str = "png", variants: dict = None) -> dict:
+        tile = self.entry(f"tile_{turn}.{format}", turn, data, format)
+        entries = [(data, tile)]
+        if variants:
+            tile["variants"] = {}
+            for label, variant_data in variants.items():
+                variant = self.entry(f"tile_{turn}_{label}.{format}", turn, variant_data, format)
+                tile["variants"][label] = variant["name"]
+                entries.append((variant_data, variant))
+        with self.lock:
+            for entry_data, entry in entries:
+                self.memory[entry["name"]] = (entry_data, entry)
+                self.memory.move_to_end(entry["name"])
+            self.tiles = [existing for existing in self.tiles if existing["name"] != tile["name"]] + [tile]
+            self.spill()
+
+        for listener in self.listeners:
+            listener(tile)
+        return tile
+
+    def spill(self):
+        while len(self.memory) > self.max_memory_tiles and self.spill_dir:
+            name, (data, tile) = self.memory.popitem(last=False)
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, name)
+            with open(path, "wb") as tile_file:
+                tile_file.write(data)
+            self.spilled[name] = (path, tile)
+
+    def get(self, name: str):
+        with self.lock:
+            if name in self.memory:
+                return self.memory[name]
+            if name not in self.spilled:
+                return None
+            path, tile = self.spilled[name]
+        with open(path, "rb") as tile_file:
+            return tile_file.read(), tile
+
+    def list(self):
+        with self.lock:
+            return list(self.tiles)
+
+    def clear(self):
+        with self.lock:
+            for path, _ in self.spilled.values():
+                if os.path.exists(path):
+                    os.remove(path)
+            self.memory.clear()
+            self.spilled.clear()
+            self.tiles = []
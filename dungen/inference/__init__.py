@@ -2,5 +2,8 @@ from .narrative import NarrativeGeneration
 from .structured import StructuredResponse
 from .chapter import SummarizeChapter
 from .map import GenerateMap
+from .cache import ResponseCache
+from .guided import GuidedResponse
+from .tiles import TileProcessor
 
-__all__ = ['NarrativeGeneration', 'StructuredResponse', 'SummarizeChapter', 'GenerateMap']
\ No newline at end of file
+__all__ = ['NarrativeGeneration', 'StructuredResponse', 'SummarizeChapter', 'GenerateMap', 'ResponseCache', 'GuidedResponse', 'TileProcessor']
\ No newline at end of file
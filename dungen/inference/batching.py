@@ -0,0 +1,128 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+import torch
+import transformers
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def shared_engine(config):
+    with _engines_lock:
+        engine = _engines.get(config.narrative_model)
+        if engine is None:
+            engine = BatchingEngine(config)
+            _engines[config.narrative_model] = engine
+        return engine
+
+
+class BatchRequest:
+    __slots__ = ("prompt", "future", "submitted")
+
+    def __init__(self, prompt: str):
+        self.prompt = prompt
+        self.future = Future()
+        self.submitted = time.monotonic()
+
+
+class BatchingEngine:
+    def __init__(self, config):
+        self.config = config
+        self.max_batch_size = config.batch_max_size
+        self.max_wait = config.batch_max_wait_ms / 1000
+
+        self.tokenizer = transformers.AutoTokenizer.from_pretrained(config.narrative_model, padding_side="left")
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.model = transformers.AutoModelForCausalLM.from_pretrained(
+            config.narrative_model,
+            torch_dtype=torch.bfloat16,
+            device_map="auto",
+        )
+
+        self.requests = queue.Queue()
+        self.stats_lock = threading.Lock()
+        self.stats = {"batches": 0, "requests": 0, "generated_tokens": 0, "busy_seconds": 0.0, "queue_seconds": 0.0}
+        self.started = time.monotonic()
+        self.thread = threading.Thread(target=self.serve, name="narrative-batcher", daemon=True)
+        self.thread.start()
+
+    def reset(self):
+        pass
+
+    def submit(self, prompt: str) -> Future:
+        request = BatchRequest(prompt)
+        self.requests.put(request)
+        return request.future
+
+    def generate(self, input: str) -> str:
+        return self.submit(input).result()
+
+    def collect(self):
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def serve(self):
+        while True:
+            batch = self.collect()
+            started = time.monotonic()
+            try:
+                texts, generated_tokens = self.run_batch([request.prompt for request in batch])
+            except Exception as exception:
+                for request in batch:
+                    request.future.set_exception(exception)
+                continue
+            finished = time.monotonic()
+
+            with self.stats_lock:
+                self.stats["batches"] += 1
+                self.stats["requests"] += len(batch)
+                self.stats["generated_tokens"] += generated_tokens
+                self.stats["busy_seconds"] += finished - started
+                self.stats["queue_seconds"] += sum(started - request.submitted for request in batch)
+
+            for request, text in zip(batch, texts):
+                request.future.set_result(text)
+
+    def run_batch(self, prompts):
+        encoded = self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.model.device)
+        with torch.inference_mode():
+            outputs = self.model.generate(
+                **encoded,
+                max_new_tokens=self.config.max_tokens,
+                do_sample=True,
+                temperature=self.config.temperature,
+                repetition_penalty=self.config.repetition_penalty,
+                min_p=self.config.min_p,
+                pad_token_id=self.tokenizer.pad_token_id,
+            )
+
+        new_tokens = outputs[:, encoded.input_ids.shape[1]:].cpu()
+        texts = [text.strip() for text in self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)]
+        generated_tokens = int((new_tokens != self.tokenizer.pad_token_id).sum())
+        return texts, generated_tokens
+
+    def report(self) -> dict:
+        with self.stats_lock:
+            stats = dict(self.stats)
+        batches = stats["batches"] or 1
+        requests = stats["requests"] or 1
+        return {
+            **stats,
+            "uptime_seconds": time.monotonic() - self.started,
+            "tokens_per_second": stats["generated_tokens"] / stats["busy_seconds"] if stats["busy_seconds"] else 0.0,
+            "mean_batch_size": stats["requests"] / batches,
+            "batch_occupancy": stats["requests"] / (batches * self.max_batch_size),
+            "mean_queue_ms": stats["queue_seconds"] / requests * 1000,
+        }
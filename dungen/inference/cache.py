@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from ..tracing import tracer
+from ..database import connect
+
+
+class ResponseCache:
+    def __init__(self, config, path=None):
+        self.enabled = config.response_cache
+        self.memory_bytes = config.response_cache_memory_bytes
+        self.ttl = config.response_cache_ttl
+        self.max_bytes = config.response_cache_max_bytes
+        self.path = path if path is not None else config.response_cache_path
+        self.memory = OrderedDict()
+        self.memory_size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.db = None
+        if self.enabled and self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.db = connect(self.path)
+            self.db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, size INTEGER, created REAL, accessed REAL)")
+            self.db.commit()
+            self.evict()
+
+    @staticmethod
+    def key(model, system_prompt, input, schema=None) -> str:
+        payload = json.dumps([model, system_prompt, input, schema], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key]
+            if self.db is None:
+                return None
+            now = time.time()
+            row = self.db.execute("SELECT value FROM responses WHERE key = ? AND created > ?", (key, now - self.ttl)).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.db.commit()
+            self.remember(key, row[0])
+            return row[0]
+
+    def put(self, key, value):
+        with self.lock:
+            self.remember(key, value)
+            if self.db is None:
+                return
+            now = time.time()
+            self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)", (key, value, len(value), now, now))
+            self.db.commit()
+            self.evict()
+
+    def remember(self, key, value):
+        self.forget(key)
+        if len(value) > self.memory_bytes:
+            return
+        self.memory[key] = value
+        self.memory_size += len(value)
+        while self.memory_size > self.memory_bytes:
+            self.memory_size -= len(self.memory.popitem(last=False)[1])
+
+    def forget(self, key):
+        value = self.memory.pop(key, None)
+        if value is not None:
+            self.memory_size -= len(value)
+
+    def evict(self):
+        self.db.execute("DELETE FROM responses WHERE created <= ?", (time.time() - self.ttl,))
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            for key, size in self.db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.forget(key)
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        self.db.commit()
+
+    def fetch(self, key, create):
+        if not self.enabled:
+            return create()
+        value = self.get(key)
+        tracer.current().set("cache_hit", value is not None)
+        with self.lock:
+            if value is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if value is not None:
+            return value
+        value = create()
+        self.put(key, value)
+        return value
+
+    def stats(self):
+        with self.lock:
+            hits, misses = self.hits, self.misses
+            memory_items, memory_bytes = len(self.memory), self.memory_size
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_items": memory_items,
+            "memory_bytes": memory_bytes,
+        }
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            self.memory_size = 0
+            if self.db is not None:
+                self.db.execute("DELETE FROM responses")
+                self.db.commit()
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
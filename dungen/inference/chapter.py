@@ -1,12 +1,21 @@
+from .cache import ResponseCache
+from ..tracing import tracer, record_usage
+
+
 class SummarizeChapter:
-    def __init__(self, config, client):
+    def __init__(self, config, client, cache=None):
         self.config = config
         self.client = client
+        self.cache = cache or ResponseCache(config, path="")
 
     def summarize_chapter(self, messages) -> str:
         text = "\n".join(f"{message['role']}: {message['content']}" for message in messages[1:])
         prompt = (f"Summarize the following turn logs into a short chapter as if recounting events in a book:\n{text}")
+        key = self.cache.key(self.config.assistant_model, self.config.summarize_chapter_system_prompt, prompt)
+        with tracer.span("chapter.summarize", model=self.config.assistant_model, messages=len(messages)):
+            return self.cache.fetch(key, lambda: self.create(prompt))
 
+    def create(self, prompt: str) -> str:
         response = self.client.chat.completions.create(
             model=self.config.assistant_model,
             messages=[
@@ -14,4 +23,5 @@ class SummarizeChapter:
                 {"role": "user", "content": prompt},
             ],
         )
+        record_usage(response)
         return response.choices[0].message.content.strip()
\ No newline at end of file
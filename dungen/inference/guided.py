@@ -0,0 +1,66 @@
+import json
+from .cache import ResponseCache
+from ..models import ChatPrompt
+from ..tracing import tracer
+
+SCHEMA_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+
+def schema_errors(data, schema: dict, path: str = "$") -> list:
+    if data is None:
+        return [] if schema.get("nullable") or schema.get("type") == "null" else [f"{path} is null"]
+    expected = SCHEMA_TYPES.get(schema.get("type"))
+    if expected and (not isinstance(data, expected) or (isinstance(data, bool) and schema.get("type") != "boolean")):
+        return [f"{path} is not {schema['type']}"]
+
+    errors = []
+    if isinstance(data, dict):
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in data:
+                errors.append(f"{path}.{key} is missing")
+        for key, value in data.items():
+            if key in properties:
+                errors.extend(schema_errors(value, properties[key], f"{path}.{key}"))
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}.{key} is not allowed")
+    elif isinstance(data, list) and "items" in schema:
+        for index, item in enumerate(data):
+            errors.extend(schema_errors(item, schema["items"], f"{path}[{index}]"))
+    return errors
+
+
+class GuidedResponse:
+    def __init__(self, config, narrative_generation, fallback, cache=None):
+        self.config = config
+        self.narrative_generation = narrative_generation
+        self.fallback = fallback
+        self.cache = cache or ResponseCache(config, path="")
+        self.schema = config.response_json_schema.get("schema", config.response_json_schema)
+        self.fallbacks = 0
+
+    def structured_response(self, input: str) -> str:
+        key = self.cache.key(self.config.narrative_model, self.config.response_assistant_system_prompt, input, self.config.response_json_schema)
+        with tracer.span("structured.extract", backend="guided", model=self.config.narrative_model):
+            return self.cache.fetch(key, lambda: self.create(input))
+
+    def create(self, input: str) -> str:
+        prompt = ChatPrompt(self.config.response_assistant_system_prompt)
+        prompt.append("user", input)
+        try:
+            content = self.narrative_generation.guided_json(prompt.render(), self.schema)
+            content = content.replace("<|im_end|>", "").strip()
+            if not schema_errors(json.loads(content), self.schema):
+                return content
+        except Exception:
+            pass
+        self.fallbacks += 1
+        tracer.current().set("fallback", True)
+        return self.fallback.create(input)
@@ -0,0 +1,102 @@
+import warnings
+import torch
+import transformers
+from ..tracing import tracer
+
+_warned = False
+
+
+class LocalEngine:
+    def __init__(self, config):
+        self.config = config
+        self.tokenizer = transformers.AutoTokenizer.from_pretrained(config.narrative_model)
+        self.model = transformers.AutoModelForCausalLM.from_pretrained(
+            config.narrative_model,
+            torch_dtype=torch.bfloat16,
+            device_map="auto",
+        )
+        self.cache = None
+        self.cache_ids = None
+
+    def reset(self):
+        self.cache = None
+        self.cache_ids = None
+
+    def streamer(self):
+        return transformers.TextIteratorStreamer(
+            self.tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=self.config.stream_timeout
+        )
+
+    def trim(self, length: int):
+        excess = self.cache.get_seq_length() - length
+        if excess > 0:
+            self.cache.crop(-excess)
+
+    def reuse_length(self, input_ids) -> int:
+        if self.cache is None or self.cache_ids is None:
+            return 0
+        limit = min(len(self.cache_ids), len(input_ids) - 1)
+        mismatches = (self.cache_ids[:limit] != input_ids[:limit]).nonzero()
+        return int(mismatches[0]) if len(mismatches) else limit
+
+    def generate(self, input: str, streamer=None) -> str:
+        input_ids = self.tokenizer(input, return_tensors="pt").input_ids
+        prompt_length = input_ids.shape[1]
+
+        reused = self.reuse_length(input_ids[0])
+        if reused:
+            self.trim(reused)
+            cache = self.cache
+        else:
+            cache = transformers.DynamicCache()
+
+        with torch.inference_mode():
+            outputs = self.model.generate(
+                input_ids=input_ids.to(self.model.device),
+                attention_mask=torch.ones_like(input_ids).to(self.model.device),
+                past_key_values=cache,
+                max_new_tokens=self.config.max_tokens,
+                do_sample=True,
+                temperature=self.config.temperature,
+                repetition_penalty=self.config.repetition_penalty,
+                min_p=self.config.min_p,
+                streamer=streamer,
+                return_dict_in_generate=True,
+            )
+
+        sequence = outputs.sequences[0].cpu()
+        span = tracer.current()
+        span.set("reused_tokens", reused)
+        span.set("prefill_tokens", prompt_length - reused)
+        span.set("decode_tokens", len(sequence) - prompt_length)
+        self.cache = outputs.past_key_values
+        self.trim(len(sequence) - 1)
+        self.cache_ids = sequence[:-1]
+
+        return self.tokenizer.decode(sequence[prompt_length:], skip_special_tokens=True).strip()
+
+    def json_constraint(self, schema: dict):
+        try:
+            from lmformatenforcer import JsonSchemaParser
+            from lmformatenforcer.integrations.transformers import build_transformers_prefix_allowed_tokens_fn
+        except ImportError:
+            global _warned
+            if not _warned:
+                _warned = True
+                warnings.warn("lm-format-enforcer is not installed, local structured output is not constrained to the schema", RuntimeWarning)
+            return None
+        return build_transformers_prefix_allowed_tokens_fn(self.tokenizer, JsonSchemaParser(schema))
+
+    def generate_json(self, input: str, schema: dict) -> str:
+        input_ids = self.tokenizer(input, return_tensors="pt").input_ids
+
+        with torch.inference_mode():
+            sequence = self.model.generate(
+                input_ids=input_ids.to(self.model.device),
+                attention_mask=torch.ones_like(input_ids).to(self.model.device),
+                max_new_tokens=self.config.structured_max_tokens,
+                do_sample=False,
+                prefix_allowed_tokens_fn=self.json_constraint(schema),
+            )[0].cpu()
+
+        return self.tokenizer.decode(sequence[input_ids.shape[1]:], skip_special_tokens=True).strip()
@@ -1,49 +1,104 @@
-import os
-import io
-import base64
-from PIL import Image
+import json
+from .cache import ResponseCache
+from .tiles import TileProcessor
+from .procedural import ProceduralMap
+from ..models import MapGrid
+from ..tracing import tracer, record_usage
 
 
 class GenerateMap:
-    def __init__(self, config, client):
+    def __init__(self, config, client, tile_store=None, cache=None):
         self.config = config
         self.client = client
+        self.tile_store = tile_store
+        self.cache = cache or ResponseCache(config, path="")
+        self.tile_processor = TileProcessor(config)
+        self.procedural = ProceduralMap(config)
 
-    def update_map(self, input: str, webui: bool, map_generation: bool, turn: int, console, panels) -> str:
-        if webui and map_generation:
-            console.print(panels.render_info_panel("MAPGEN", f"{self.config.image_model} | One moment while I generate the map tile..."))
-            prompt = f"{self.config.tile_generation_system_prompt}\n\n{self.config.system_prompt}\n\n{input}"
-            save_dir = os.path.join("assets", "mini-map")
-            os.makedirs(save_dir, exist_ok=True)
-            img = self.client.images.generate(
-                model=self.config.image_model,
-                prompt=prompt,
-                n=1,
-                size="1024x1024",
-            )
-
-            image_bytes = base64.b64decode(img.data[0].b64_json)
-            image = Image.open(io.BytesIO(image_bytes))
-            resized_image = image.resize((128, 128), Image.Resampling.LANCZOS)
-            save_path = os.path.join(save_dir, f"tile_{turn}.png")
-            resized_image.save(save_path)
-            console.print(panels.render_info_panel("MAPGEN", f"{self.config.image_model} | Done! Ready for next turn..."))
-            return ""
-        else:
+    def generate_tile(self, prompt: str) -> str:
+        img = self.client.images.generate(
+            model=self.config.image_model,
+            prompt=prompt,
+            n=1,
+            size="1024x1024",
+        )
+        return img.data[0].b64_json
+
+    def generate_ascii(self, input: str) -> str:
+        response = self.client.chat.completions.create(
+            model=self.config.reasoning_model,
+            messages=[
+                {"role": "system", "content": self.config.map_generator_system_prompt},
+                {"role": "user", "content": input},
+            ],
+        )
+        record_usage(response)
+        return response.choices[0].message.content.strip()
+
+    def generate_delta(self, input: str) -> str:
+        response = self.client.chat.completions.create(
+            model=self.config.reasoning_model,
+            messages=[
+                {"role": "system", "content": self.config.map_delta_system_prompt},
+                {"role": "user", "content": input},
+            ],
+            response_format={"type": "json_object"},
+        )
+        record_usage(response)
+        return response.choices[0].message.content.strip()
+
+    def ascii_map(self, input: str) -> str:
+        key = self.cache.key(self.config.reasoning_model, self.config.map_generator_system_prompt, input)
+        content = self.cache.fetch(key, lambda: self.generate_ascii(input))
+
+        if content.startswith("```") and content.endswith("```"):
+            content = content[3:-3].strip()
+        elif content.startswith("`") and content.endswith("`"):
+            content = content[1:-1].strip()
+        return content
+
+    def update_delta(self, narrative: str, grid, turn: int, console, panels):
+        with tracer.span("map.generate", mode="delta", turn=turn) as span:
             console.print(panels.render_info_panel("MAPGEN", f"{self.config.reasoning_model} | One moment while I update the game map..."))
-            response = self.client.chat.completions.create(
-                model=self.config.reasoning_model,
-                messages=[
-                    {"role": "system", "content": self.config.map_generator_system_prompt},
-                    {"role": "user", "content": input},
-                ],
-            )
-            
-            content = response.choices[0].message.content.strip()
-            
-            if content.startswith("```") and content.endswith("```"):
-                content = content[3:-3].strip()
-            elif content.startswith("`") and content.endswith("`"):
-                content = content[1:-1].strip()
-            
-            return content
\ No newline at end of file
+            input = f"Narrative: {narrative}\n\nCurrent Map:\n{grid.to_ascii()}"
+            key = self.cache.key(self.config.reasoning_model, self.config.map_delta_system_prompt, input, "delta")
+            try:
+                data = json.loads(self.cache.fetch(key, lambda: self.generate_delta(input)))
+                if isinstance(data, dict) and isinstance(data.get("map"), str):
+                    updated = MapGrid.from_ascii(data["map"], grid.tiles)
+                    if len(updated.find(grid.symbol("Player"))) != 1:
+                        raise ValueError("Full map must contain exactly one player tile")
+                else:
+                    updated = grid.apply_edits(data.get("edits") if isinstance(data, dict) else None, self.config.map_delta_max_edits)
+                span.set("edits", len(updated.changes))
+            except ValueError as error:
+                span.set("fallback", str(error))
+                updated = MapGrid.from_ascii(self.ascii_map(input), grid.tiles)
+            return updated
+
+    def update_procedural(self, narrative: str, meta: dict, grid, webui: bool, turn: int) -> str:
+        with tracer.span("map.generate", mode="procedural", turn=turn):
+            self.procedural.update(grid, narrative, meta, turn)
+            if webui:
+                variants = self.tile_processor.process_image(grid.to_image())
+                thumbnail = variants.pop("thumbnail")
+                self.tile_store.put(turn, thumbnail, self.config.tile_format, variants)
+                return ""
+            return grid.to_ascii()
+
+    def update_map(self, input: str, webui: bool, map_generation: bool, turn: int, console, panels) -> str:
+        with tracer.span("map.generate", mode="tile" if webui and map_generation else "ascii", turn=turn):
+            if webui and map_generation:
+                console.print(panels.render_info_panel("MAPGEN", f"{self.config.image_model} | One moment while I generate the map tile..."))
+                prompt = f"{self.config.tile_generation_system_prompt}\n\n{self.config.system_prompt}\n\n{input}"
+                b64_json = self.generate_tile(prompt)
+
+                with tracer.span("map.tile.process", format=self.config.tile_format):
+                    variants = self.tile_processor.process(b64_json)
+                thumbnail = variants.pop("thumbnail")
+                self.tile_store.put(turn, thumbnail, self.config.tile_format, variants)
+                console.print(panels.render_info_panel("MAPGEN", f"{self.config.image_model} | Done! Ready for next turn..."))
+                return ""
+            else:
+                console.print(panels.render_info_panel("MAPGEN", f"{self.config.reasoning_model} | One moment while I update the game map..."))
+                return self.ascii_map(input)
\ No newline at end of file
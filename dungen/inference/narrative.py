@@ -1,8 +1,9 @@
 import time
 import random
-import requests
-import transformers
-import torch
+import threading
+from contextlib import closing
+from .remote import RunPodClient
+from ..tracing import tracer
 
 
 class NarrativeGeneration:
@@ -11,70 +12,131 @@ class NarrativeGeneration:
         self.client = client
         self.request_key = request_key
         self.remote_inference = remote_inference
-        self._device_pipeline = None
+        self._device_engine = None
+        self._remote_client = None
+
+    def sampling_params(self) -> dict:
+        return {
+            "max_tokens": self.config.max_tokens,
+            "temperature": self.config.temperature,
+            "repetition_penalty": self.config.repetition_penalty,
+            "min_p": self.config.min_p
+        }
+
+    def load_remote_client(self):
+        if self._remote_client is None:
+            self._remote_client = RunPodClient(self.config, self.request_key)
+        return self._remote_client
+
+    @staticmethod
+    def output_text(output) -> str:
+        return "".join(map(str, output[0]["choices"][0]["tokens"]))
 
     def vllm_pipeline(self, input: str) -> str:
-        url = f"https://api.runpod.ai/v2/{self.config.endpoint_id}/runsync"
-        headers = {
-            "Authorization": f"Bearer {self.request_key}",
-            "Content-Type": "application/json"
+        client = self.load_remote_client()
+        data = {
+            "input": {
+                "prompt": input,
+                "sampling_params": self.sampling_params()
+            }
         }
 
+        output = client.run(data)
+        if not output:
+            raise RuntimeError("Failed to get valid output from vLLM.")
+        return self.output_text(output).replace("<|im_end|>", "").strip()
+
+    def vllm_stream(self, input: str):
+        client = self.load_remote_client()
         data = {
             "input": {
                 "prompt": input,
-                "sampling_params": {
-                    "max_tokens": self.config.max_tokens,
-                    "temperature": self.config.temperature,
-                    "repetition_penalty": self.config.repetition_penalty,
-                    "min_p": self.config.min_p
-                }
+                "stream": True,
+                "sampling_params": self.sampling_params()
             }
         }
 
-        for _ in range(3):
-            response = requests.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            output = response.json().get("output")
-            if output:
-                try:
-                    tokens = output[0]["choices"][0]["tokens"]
-                    text = " ".join(map(str, tokens))
-                    return text.rstrip("<|im_end|>").strip()
-                except Exception:
-                    pass
-            time.sleep(2)
-
-        raise RuntimeError("Failed to get valid output from vLLM after retries.")
+        for output in client.stream(data):
+            for choice in output.get("choices", []):
+                text = "".join(map(str, choice.get("tokens", [])))
+                if text:
+                    yield text
+
+    def guided_json(self, input: str, schema: dict) -> str:
+        if not self.remote_inference:
+            engine = self.load_device_engine()
+            if hasattr(engine, "generate_json"):
+                return engine.generate_json(input, schema)
+            return engine.generate(input)
+
+        sampling_params = self.sampling_params()
+        sampling_params.update({
+            "max_tokens": self.config.structured_max_tokens,
+            "temperature": 0.0,
+            "guided_json": schema
+        })
+        output = self.load_remote_client().run({
+            "input": {
+                "prompt": input,
+                "sampling_params": sampling_params
+            }
+        })
+        if not output:
+            raise RuntimeError("Failed to get valid output from vLLM.")
+        return self.output_text(output)
+
+    def load_device_engine(self):
+        if self._device_engine is None:
+            if self.config.local_engine == "batch":
+                from .batching import shared_engine
+                self._device_engine = shared_engine(self.config)
+            else:
+                from .local import LocalEngine
+                self._device_engine = LocalEngine(self.config)
+        return self._device_engine
+
+    def reset_cache(self):
+        if self._device_engine is not None:
+            self._device_engine.reset()
+
+    def device_stream(self, input: str):
+        engine = self.load_device_engine()
+        if self.config.local_engine == "batch":
+            yield engine.generate(input)
+            return
+        streamer = engine.streamer()
+        errors = []
+
+        def generate():
+            try:
+                engine.generate(input, streamer)
+            except BaseException as error:
+                errors.append(error)
+                streamer.end()
+
+        thread = threading.Thread(target=generate, daemon=True)
+        thread.start()
+        for text in streamer:
+            if text:
+                yield text
+        thread.join()
+        if errors:
+            raise errors[0]
 
     def device_pipeline(self, input: str) -> str:
-        if self._device_pipeline is None:
-            self._device_pipeline = transformers.pipeline(
-                "text-generation",
-                model=self.config.narrative_model,
-                model_kwargs={"torch_dtype": torch.bfloat16},
-                device_map="auto",
-            )
-        
-        outputs = self._device_pipeline(
-            input,
-            max_new_tokens=self.config.max_tokens,
-            do_sample=True,
-            temperature=self.config.temperature,
-            repetition_penalty=self.config.repetition_penalty,
-            min_p=self.config.min_p
-        )
-        
-        response = outputs[0]["generated_text"]
-        response_text = response[len(input):].strip()
-        
-        if response_text.endswith("<|im_end|>"):
-            response_text = response_text[:-10].strip()
-        
-        return response_text
-
-    def generate_narrative(self, input: str, messages, console, panels) -> str:
-        messages.append({"role": "user", "content": input})
+        return self.load_device_engine().generate(input)
+
+    def complete(self, input: str) -> str:
+        if self.remote_inference:
+            return self.vllm_pipeline(input)
+        return self.device_pipeline(input)
+
+    def prepare_input(self, input: str, prompt, console, panels) -> str:
+        with tracer.span("prompt.build") as span:
+            prompt.append("user", input)
+            rendered = prompt.render()
+            span.set("prompt_tokens", prompt.tokens)
+            span.set("messages", len(prompt.messages))
 
         dm_waiting_strings = [
             "You notice something different…",
@@ -85,22 +147,35 @@ class NarrativeGeneration:
         ]
         console.print(panels.render_info_panel("DUNGEN MASTER", f"{self.config.narrative_model} | {random.choice(dm_waiting_strings)}"))
 
-        device_input = f"<|im_start|>system\n{self.config.system_prompt}<|im_end|>\n"
+        return rendered
+
+    def generate_narrative(self, input: str, prompt, console, panels) -> str:
+        device_input = self.prepare_input(input, prompt, console, panels)
+
+        with tracer.span("narrative.generate", remote=self.remote_inference) as span:
+            content = self.complete(device_input)
+            prompt.append("assistant", content)
+            span.set("completion_tokens", prompt.token_counts[-1])
+        return content
 
-        for message in messages[1:]:
-            if message["role"] == "system":
-                device_input += f"<|im_start|>system\n{message['content']}<|im_end|>\n"
-            elif message["role"] == "user":
-                device_input += f"<|im_start|>user\n{message['content']}<|im_end|>\n"
-            elif message["role"] == "assistant":
-                device_input += f"<|im_start|>assistant\n{message['content']}<|im_end|>\n"
-        
-        device_input += f"<|im_start|>assistant\n"
+    def stream_narrative(self, input: str, prompt, console, panels):
+        device_input = self.prepare_input(input, prompt, console, panels)
 
         if self.remote_inference:
-            content = self.vllm_pipeline(device_input)
+            deltas = self.vllm_stream(device_input)
         else:
-            content = self.device_pipeline(device_input)
+            deltas = self.device_stream(device_input)
 
-        messages.append({"role": "assistant", "content": content})
-        return content
\ No newline at end of file
+        with tracer.span("narrative.generate", remote=self.remote_inference, stream=True) as span:
+            started = time.monotonic()
+            chunks = []
+            with closing(deltas):
+                for delta in deltas:
+                    delta = delta.replace("<|im_end|>", "")
+                    if delta:
+                        if not chunks:
+                            span.set("time_to_first_token_ms", round(1000 * (time.monotonic() - started), 1))
+                        chunks.append(delta)
+                        yield delta
+            prompt.append("assistant", "".join(chunks).strip())
+            span.set("completion_tokens", prompt.token_counts[-1])
@@ -0,0 +1,88 @@
+import re
+import random
+
+DIRECTIONS = {
+    "north": (-1, 0), "northward": (-1, 0), "south": (1, 0), "southward": (1, 0),
+    "east": (0, 1), "eastward": (0, 1), "west": (0, -1), "westward": (0, -1),
+}
+MOVEMENT = (
+    "walk", "move", "step", "enter", "follow", "run", "flee", "head", "climb", "descend", "ascend",
+    "continue", "proceed", "venture", "explore", "advance", "crawl", "wade", "cross", "pass", "through", "into",
+)
+FEATURES = {
+    "Water": ("water", "river", "lake", "pool", "stream", "flood", "puddle", "well"),
+    "Stairs": ("stairs", "staircase", "stairway", "ladder", "steps"),
+    "Door": ("door", "doorway", "gate", "portcullis", "archway", "hatch"),
+    "Wall": ("wall", "walls", "rubble", "barricade", "collapsed", "dead end"),
+}
+DEATH = ("slain", "slay", "killed", "kill", "defeated", "dies", "died", "dead", "corpse", "collapses", "falls lifeless")
+WORD = re.compile(r"[a-z]+")
+
+
+def mentions(text: str, words) -> bool:
+    return any(re.search(rf"\b{re.escape(word)}\b", text) for word in words)
+
+
+class ProceduralMap:
+    def __init__(self, config):
+        self.config = config
+
+    @staticmethod
+    def neighbours(row: int, col: int):
+        return [(row + d_row, col + d_col) for d_row, d_col in ((-1, 0), (0, 1), (1, 0), (0, -1))]
+
+    def update(self, grid, narrative: str, meta: dict, turn: int):
+        text = (narrative or "").lower()
+        meta = meta if isinstance(meta, dict) else {}
+        rng = random.Random(f"{turn}:{text}")
+        player, ground = grid.symbol("Player"), grid.symbol("Open ground")
+
+        found = grid.find(player)
+        row, col = found[0] if found else grid.set(0, 0, player)
+
+        heading = None
+        for word in WORD.findall(text):
+            heading = DIRECTIONS.get(word, heading)
+        if found and (heading or mentions(text, MOVEMENT)):
+            if heading is None:
+                open_cells = [cell for cell in self.neighbours(row, col) if grid.get(*cell) in (None, ground)]
+                target = rng.choice(open_cells) if open_cells else (row, col)
+            else:
+                target = (row + heading[0], col + heading[1])
+            if grid.get(*target) in (None, ground, grid.symbol("Door"), grid.symbol("Stairs")):
+                grid.set(row, col, ground)
+                row, col = grid.set(*target, player)
+
+        for name, words in FEATURES.items():
+            if mentions(text, words):
+                row, col = self.place_near(grid, rng, row, col, name)
+
+        npc = meta.get("npc")
+        npc_health = meta.get("npc_health")
+        dead = mentions(text, DEATH) or (isinstance(npc_health, (int, float)) and npc_health <= 0)
+        if npc:
+            row, col = self.mark(grid, rng, row, col, "NPC", "Dead NPC", dead)
+        elif dead or (isinstance(meta.get("player_health_change"), (int, float)) and meta["player_health_change"] < 0):
+            row, col = self.mark(grid, rng, row, col, "Encounter", "Dead Encounter", dead)
+        return grid
+
+    def place_near(self, grid, rng, row: int, col: int, name: str):
+        symbol = grid.symbol(name)
+        if symbol is None:
+            return row, col
+        neighbours = self.neighbours(row, col)
+        candidates = [cell for cell in neighbours if grid.get(*cell) is None]
+        if not candidates or any(grid.get(*cell) == symbol for cell in neighbours):
+            return row, col
+        target_row, target_col = rng.choice(candidates)
+        shifted_row, shifted_col = grid.set(target_row, target_col, symbol)
+        return row + shifted_row - target_row, col + shifted_col - target_col
+
+    def mark(self, grid, rng, row: int, col: int, alive: str, fallen: str, dead: bool):
+        alive_symbol, fallen_symbol = grid.symbol(alive), grid.symbol(fallen)
+        nearby = [cell for cell in self.neighbours(row, col) if grid.get(*cell) == alive_symbol]
+        if nearby:
+            if dead and fallen_symbol is not None:
+                grid.set(*nearby[0], fallen_symbol)
+            return row, col
+        return self.place_near(grid, rng, row, col, fallen if dead else alive)
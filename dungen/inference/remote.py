@@ -0,0 +1,110 @@
+import time
+import random
+import requests
+from requests.adapters import HTTPAdapter
+from ..tracing import tracer
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+PENDING_STATUSES = {"IN_QUEUE", "IN_PROGRESS"}
+FAILED_STATUSES = {"FAILED", "CANCELLED", "TIMED_OUT"}
+
+
+class RunPodClient:
+    def __init__(self, config, request_key=None):
+        self.config = config
+        self.base_url = f"{config.runpod_base_url.rstrip('/')}/{config.endpoint_id}"
+        self.timeout = (config.request_connect_timeout, config.request_read_timeout)
+        self.retries = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.request_pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {request_key}",
+            "Content-Type": "application/json"
+        })
+
+    def backoff(self, attempt: int, base: float = None) -> float:
+        base = self.config.request_backoff if base is None else base
+        return random.uniform(0, min(self.config.request_backoff_max, base * 2 ** attempt))
+
+    def request(self, method: str, path: str, **kwargs) -> dict:
+        for attempt in range(self.config.request_retries + 1):
+            try:
+                response = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json()
+                error = requests.HTTPError(f"{response.status_code} from RunPod {path}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as exception:
+                error = exception
+            if attempt == self.config.request_retries:
+                raise error
+            self.retries += 1
+            tracer.current().add("retries", 1)
+            time.sleep(self.backoff(attempt))
+
+    def wait(self, result: dict) -> dict:
+        deadline = time.monotonic() + self.config.runpod_job_timeout
+        attempt = 0
+        while result.get("status") in PENDING_STATUSES:
+            if time.monotonic() > deadline:
+                self.cancel(result["id"])
+                raise TimeoutError(f"RunPod job {result['id']} did not finish within {self.config.runpod_job_timeout}s.")
+            time.sleep(self.backoff(attempt, self.config.runpod_poll_interval))
+            attempt += 1
+            result = self.request("GET", f"/status/{result['id']}")
+        span = tracer.current()
+        span.set("polls", attempt)
+        span.set("delay_ms", result.get("delayTime"))
+        span.set("execution_ms", result.get("executionTime"))
+        return result
+
+    def cancel(self, job_id: str):
+        try:
+            self.request("POST", f"/cancel/{job_id}")
+        except requests.RequestException:
+            pass
+
+    def run(self, payload: dict):
+        with tracer.span("runpod.run", endpoint="run" if self.config.runpod_async else "runsync") as span:
+            if self.config.runpod_async:
+                result = self.request("POST", "/run", json=payload)
+            else:
+                result = self.request("POST", "/runsync", json=payload)
+            result = self.wait(result)
+            span.set("status", result.get("status"))
+            if result.get("status") in FAILED_STATUSES:
+                raise RuntimeError(f"RunPod job ended with status {result['status']}: {result.get('error')}")
+            return result.get("output")
+
+    def stream(self, payload: dict):
+        job_id = self.request("POST", "/run", json=payload)["id"]
+        deadline = time.monotonic() + self.config.runpod_job_timeout
+        attempt = 0
+        finished = False
+        try:
+            while True:
+                result = self.request("GET", f"/stream/{job_id}")
+                chunks = result.get("stream", [])
+                for chunk in chunks:
+                    outputs = chunk.get("output", [])
+                    yield from outputs if isinstance(outputs, list) else [outputs]
+
+                status = result.get("status")
+                if status == "COMPLETED":
+                    finished = True
+                    return
+                if status in FAILED_STATUSES:
+                    finished = True
+                    raise RuntimeError(f"RunPod stream ended with status {status}: {result.get('error')}")
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"RunPod job {job_id} did not finish within {self.config.runpod_job_timeout}s.")
+
+                attempt = 0 if chunks else attempt + 1
+                if attempt:
+                    time.sleep(self.backoff(attempt - 1, self.config.runpod_poll_interval))
+        finally:
+            if not finished:
+                self.cancel(job_id)
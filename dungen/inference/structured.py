@@ -1,9 +1,19 @@
+from .cache import ResponseCache
+from ..tracing import tracer, record_usage
+
+
 class StructuredResponse:
-    def __init__(self, config, client):
+    def __init__(self, config, client, cache=None):
         self.config = config
         self.client = client
+        self.cache = cache or ResponseCache(config, path="")
 
     def structured_response(self, input: str) -> str:
+        key = self.cache.key(self.config.assistant_model, self.config.response_assistant_system_prompt, input, self.config.response_json_schema)
+        with tracer.span("structured.extract", backend="openai", model=self.config.assistant_model):
+            return self.cache.fetch(key, lambda: self.create(input))
+
+    def create(self, input: str) -> str:
         response = self.client.chat.completions.create(
             model=self.config.assistant_model,
             messages=[
@@ -15,4 +25,5 @@ class StructuredResponse:
                 "json_schema": self.config.response_json_schema
             }
         )
+        record_usage(response)
         return response.choices[0].message.content.strip()
\ No newline at end of file
@@ -0,0 +1,99 @@
+import io
+import binascii
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class Base64Reader(io.RawIOBase):
+    def __init__(self, encoded: str):
+        self.encoded = encoded
+        self.position = 0
+        self.size = len(encoded) // 4 * 3 - (len(encoded) - len(encoded.rstrip("=")))
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = (0, self.position, self.size)[whence]
+        self.position = max(0, base + offset)
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        count = min(len(buffer), self.size - self.position)
+        if count <= 0:
+            return 0
+        start = self.position // 3
+        end = -(-(self.position + count) // 3)
+        data = binascii.a2b_base64(self.encoded[start * 4:end * 4])
+        offset = self.position - start * 3
+        buffer[:count] = data[offset:offset + count]
+        self.position += count
+        return count
+
+
+def encode_tile(image, format: str, quality: int) -> bytes:
+    output = io.BytesIO()
+    if format == "webp":
+        image.save(output, format="WEBP", quality=quality, method=4)
+    else:
+        image.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+def process_tile(b64_json: str, sizes: dict, format: str = "png", quality: int = 80) -> dict:
+    image = Image.open(io.BufferedReader(Base64Reader(b64_json), 1 << 16))
+    image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+
+    return tile_variants(image, sizes, format, quality)
+
+
+def tile_variants(image, sizes: dict, format: str = "png", quality: int = 80, resample=Image.Resampling.LANCZOS) -> dict:
+    variants = {}
+    for label, size in sorted(sizes.items(), key=lambda item: -item[1]):
+        if image.size != (size, size):
+            image = image.resize((size, size), resample, reducing_gap=3.0 if resample != Image.Resampling.NEAREST else None)
+        variants[label] = encode_tile(image, format, quality)
+    return variants
+
+
+def tile_pool(workers: int):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+class TileProcessor:
+    def __init__(self, config):
+        self.format = config.tile_format
+        self.quality = config.tile_quality
+        self.workers = config.tile_workers
+        self.sizes = {"thumbnail": config.tile_thumbnail_size}
+        if config.tile_full_size:
+            self.sizes["full"] = config.tile_full_size
+
+    def warm(self) -> None:
+        if self.workers > 0:
+            tile_pool(self.workers).submit(int)
+
+    def process(self, b64_json: str) -> dict:
+        if self.workers <= 0:
+            return process_tile(b64_json, self.sizes, self.format, self.quality)
+        return tile_pool(self.workers).submit(process_tile, b64_json, self.sizes, self.format, self.quality).result()
+
+    def process_image(self, image) -> dict:
+        return tile_variants(image, self.sizes, self.format, self.quality, Image.Resampling.NEAREST)
@@ -0,0 +1,48 @@
+import threading
+
+_tokenizers = {}
+_lock = threading.Lock()
+
+
+def load_tokenizer(model: str, local_files_only: bool):
+    from tokenizers import Tokenizer
+    from huggingface_hub import hf_hub_download
+    return Tokenizer.from_file(hf_hub_download(model, "tokenizer.json", local_files_only=local_files_only))
+
+
+def download_tokenizer(model: str):
+    try:
+        tokenizer = load_tokenizer(model, local_files_only=False)
+    except Exception:
+        return
+    with _lock:
+        _tokenizers[model] = tokenizer
+
+
+def shared_tokenizer(model: str):
+    with _lock:
+        if model in _tokenizers:
+            return _tokenizers[model]
+        try:
+            _tokenizers[model] = load_tokenizer(model, local_files_only=True)
+        except Exception:
+            _tokenizers[model] = None
+            threading.Thread(target=download_tokenizer, args=(model,), name="tokenizer", daemon=True).start()
+        return _tokenizers[model]
+
+
+class TokenCounter:
+    def __init__(self, config):
+        self.config = config
+
+    def load_tokenizer(self):
+        return shared_tokenizer(self.config.narrative_model)
+
+    def count(self, text: str) -> int:
+        tokenizer = self.load_tokenizer()
+        if tokenizer is None:
+            return len(text) // 4 + 1
+        return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def __call__(self, text: str) -> int:
+        return self.count(text)
@@ -1,16 +1,41 @@
 import argparse
 from dungen.game import Game
+from dungen.game.chapters import ChapterStore, chapter_paths
+from dungen.game.snapshot import snapshot_path
 
 
 def main():
     parser = argparse.ArgumentParser(description="Play DUNGEN!")
+    parser.add_argument("command", nargs="?", default="play", choices=["play", "chapters", "bench"], help="play (default), chapters to inspect and maintain the chapter store, or bench to benchmark the turn loop")
     parser.add_argument("--inference", default="config.yaml", help="Path to model configuration YAML file")
     parser.add_argument("--settings", help="Path to game configuration YAML file (e.g., cyberpunk.yaml, fantasy.yaml)")
     parser.add_argument("--vllm", action="store_true", help="Use vLLM endpoint(RunPod) for narrative generation")
     parser.add_argument("--map", action="store_true", help="Expiremental map generation")
+    parser.add_argument("--stream", action="store_true", help="Stream the narrative as it is generated")
     parser.add_argument("--webui", action="store_true", help="Controls output for the Web UI")
-    args = parser.parse_args()
-    Game(inference_config_path=args.inference, game_settings_path=args.settings, remote_inference=args.vllm, map_generation=args.map, webui=args.webui).start()
+    parser.add_argument("--resume", action="store_true", help="Continue the last saved game for these settings instead of starting a new one")
+    parser.add_argument("--profile", action="store_true", help="Show a timing panel after each turn")
+    parser.add_argument("--trace", help="Append per-stage spans to this JSONL trace file")
+    parser.add_argument("--compact", action="store_true", help="Checkpoint and vacuum the chapter store (chapters command)")
+    args, extra = parser.parse_known_args()
+
+    if args.command == "bench":
+        from dungen.bench.turns import main as bench
+        bench(["--inference", args.inference, "--settings", args.settings or "fantasy.yaml", *extra])
+        return
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    if args.command == "chapters":
+        store_path, legacy_path = chapter_paths(args.settings)
+        store = ChapterStore(store_path, legacy_path=legacy_path)
+        if args.compact:
+            store.compact()
+        print(f"{store.count()} chapters in {store_path}")
+        store.close()
+        return
+
+    Game(inference_config_path=args.inference, game_settings_path=args.settings, remote_inference=args.vllm, map_generation=args.map, webui=args.webui, stream=args.stream, profile=args.profile, trace_path=args.trace, resume=args.resume, snapshot_path=snapshot_path(args.settings)).start()
 
 
 if __name__ == "__main__":
@@ -1,4 +1,6 @@
 from .data_model import Player, EncounterEntry
 from .config import Config
+from .prompt import ChatPrompt
+from .grid import MapGrid
 
-__all__ = ['Player', 'EncounterEntry', 'Config']
\ No newline at end of file
+__all__ = ['Player', 'EncounterEntry', 'Config', 'ChatPrompt', 'MapGrid']
\ No newline at end of file
@@ -1,4 +1,6 @@
+import os
 import yaml
+from .grid import parse_tiles
 from .data_model import Player
 
 class Config:
@@ -17,13 +19,56 @@ class Config:
         
         self.narrative_model = model_parameters.get("narrative_model", "LatitudeGames/Wayfarer-12B")
         self.max_tokens = model_parameters.get("max_tokens", 384)
+        self.stream_timeout = model_parameters.get("stream_timeout", 300)
+        self.context_window = model_parameters.get("context_window", 8192)
+        self.context_summary_ratio = model_parameters.get("context_summary_ratio", 0.5)
+        self.summary_wait_timeout = model_parameters.get("summary_wait_timeout", 10)
         self.temperature = model_parameters.get("temperature", 0.8)
         self.repetition_penalty = model_parameters.get("repetition_penalty", 1.05)
         self.min_p = model_parameters.get("min_p", 0.025)
+        self.structured_backend = model_parameters.get("structured_backend", "openai")
+        self.structured_max_tokens = model_parameters.get("structured_max_tokens", 768)
+        self.snapshot_compact_every = model_parameters.get("snapshot_compact_every", 50)
+        self.encounter_memory_limit = model_parameters.get("encounter_memory_limit", 256)
+        self.encounter_index_limit = model_parameters.get("encounter_index_limit", 256)
+        self.memory_retrieval = model_parameters.get("memory_retrieval", True)
+        self.memory_top_k = model_parameters.get("memory_top_k", 3)
+        self.memory_token_budget = model_parameters.get("memory_token_budget", 256)
+        self.speculation = model_parameters.get("speculation", False)
+        self.speculation_max_reactions = model_parameters.get("speculation_max_reactions", 3)
+        self.speculation_structured = model_parameters.get("speculation_structured", False)
+        self.speculation_token_budget = model_parameters.get("speculation_token_budget", 50000)
+        self.local_engine = model_parameters.get("local_engine", "cache")
+        self.batch_max_size = model_parameters.get("batch_max_size", 8)
+        self.batch_max_wait_ms = model_parameters.get("batch_max_wait_ms", 50)
         self.endpoint_id = model_parameters.get("endpoint_id")
+        self.runpod_base_url = model_parameters.get("runpod_base_url", "https://api.runpod.ai/v2")
+        self.runpod_async = model_parameters.get("runpod_async", False)
+        self.runpod_job_timeout = model_parameters.get("runpod_job_timeout", 300)
+        self.runpod_poll_interval = model_parameters.get("runpod_poll_interval", 0.25)
+        self.request_connect_timeout = model_parameters.get("request_connect_timeout", 5)
+        self.request_read_timeout = model_parameters.get("request_read_timeout", 120)
+        self.request_retries = model_parameters.get("request_retries", 3)
+        self.request_backoff = model_parameters.get("request_backoff", 0.5)
+        self.request_backoff_max = model_parameters.get("request_backoff_max", 8)
+        self.request_pool_size = model_parameters.get("request_pool_size", 4)
         self.assistant_model = model_parameters.get("assistant_model", "gpt-4o-mini")
         self.reasoning_model = model_parameters.get("reasoning_model", "o4-mini")
         self.image_model = model_parameters.get("image_model", "gpt-image-1")
+        self.tile_format = model_parameters.get("tile_format", "webp")
+        self.tile_quality = model_parameters.get("tile_quality", 80)
+        self.tile_thumbnail_size = model_parameters.get("tile_thumbnail_size", 128)
+        self.tile_full_size = model_parameters.get("tile_full_size", 512)
+        self.tile_workers = model_parameters.get("tile_workers", 1)
+        self.map_backend = model_parameters.get("map_backend", "openai")
+        self.map_delta = model_parameters.get("map_delta", True)
+        self.map_delta_max_edits = model_parameters.get("map_delta_max_edits", 64)
+        self.map_wait_timeout = model_parameters.get("map_wait_timeout", 2)
+        self.response_cache = model_parameters.get("response_cache", True)
+        self.response_cache_path = model_parameters.get("response_cache_path", os.path.join(".cache", "responses.db"))
+        self.response_cache_memory_bytes = model_parameters.get("response_cache_memory_bytes", 4194304)
+        self.response_cache_ttl = model_parameters.get("response_cache_ttl", 604800)
+        self.response_cache_max_bytes = model_parameters.get("response_cache_max_bytes", 268435456)
 
         system_prompt_base = model_parameters["system_prompt_base"]
         narrative_prompt = game_parameters["system_prompt"]
@@ -33,6 +78,8 @@ class Config:
         self.response_json_schema = model_parameters.get("response_json_schema")
         self.map_generator_system_prompt = model_parameters.get("map_generation_system_prompt")
         self.tile_generation_system_prompt = model_parameters.get("tile_generation_system_prompt")
+        self.map_tiles = model_parameters.get("map_tiles") or parse_tiles(self.map_generator_system_prompt)
+        self.map_delta_system_prompt = model_parameters.get("map_delta_system_prompt")
         self.summarize_chapter_system_prompt = model_parameters.get("summarize_chapter_system_prompt")
         
         game_settings = game_parameters.get("game_settings", {})
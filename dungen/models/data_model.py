@@ -2,7 +2,7 @@ from dataclasses import dataclass, field
 from typing import List
 
 
-@dataclass
+@dataclass(slots=True)
 class Player:
     name: str
     age: int
@@ -15,7 +15,7 @@ class Player:
     inventory: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class EncounterEntry:
     turn: int
     npc: str
@@ -0,0 +1,169 @@
+import re
+import numpy as np
+
+VOID = 0
+CELL = re.compile(r"\[(.)\]")
+ROW = re.compile(r"\s*(\d+) ")
+LEGEND = re.compile(r"^\s*-\s*\[(.)\] = (.+?)(?: tile)?\s*$", re.MULTILINE)
+
+TILE_COLORS = {
+    "Open ground": (74, 66, 56),
+    "Encounter": (176, 64, 52),
+    "Dead Encounter": (96, 52, 46),
+    "NPC": (72, 124, 176),
+    "Dead NPC": (62, 72, 92),
+    "Player": (232, 204, 84),
+    "Water": (52, 92, 156),
+    "Stairs": (156, 136, 104),
+    "Wall": (104, 104, 104),
+    "Door": (134, 88, 46),
+}
+VOID_COLOR = (14, 12, 10)
+
+
+def parse_tiles(legend: str) -> dict:
+    return {symbol: name for symbol, name in LEGEND.findall(legend or "")}
+
+
+class MapGrid:
+    def __init__(self, tiles: dict, cells=None):
+        self.tiles = dict(tiles)
+        self.symbols = [None] + list(self.tiles)
+        self.codes = {symbol: code for code, symbol in enumerate(self.symbols) if symbol is not None}
+        self.cells = np.zeros((0, 0), dtype=np.uint8) if cells is None else cells
+        self.changes = []
+
+    @classmethod
+    def from_ascii(cls, text: str, tiles: dict):
+        grid = cls(tiles)
+        rows = {}
+        for line in (text or "").splitlines():
+            match = ROW.match(line)
+            if not match or not CELL.search(line):
+                continue
+            body = line[match.end():]
+            rows[int(match.group(1))] = [(cell.start() // 3, cell.group(1)) for cell in CELL.finditer(body)]
+        if not rows:
+            return grid
+
+        height = max(rows) + 1
+        width = max((col for cells in rows.values() for col, _ in cells), default=-1) + 1
+        grid.cells = np.zeros((height, width), dtype=np.uint8)
+        for row, cells in rows.items():
+            for col, symbol in cells:
+                grid.cells[row, col] = grid.code(symbol)
+        return grid
+
+    @property
+    def shape(self):
+        return self.cells.shape
+
+    def code(self, symbol: str) -> int:
+        return self.codes.get(symbol, self.codes.get(" ", VOID))
+
+    def symbol(self, name: str):
+        for symbol, tile in self.tiles.items():
+            if tile == name:
+                return symbol
+        return None
+
+    def copy(self):
+        return MapGrid(self.tiles, self.cells.copy())
+
+    def inside(self, row: int, col: int) -> bool:
+        return 0 <= row < self.cells.shape[0] and 0 <= col < self.cells.shape[1]
+
+    def get(self, row: int, col: int):
+        return self.symbols[self.cells[row, col]] if self.inside(row, col) else None
+
+    def grow(self, row: int, col: int):
+        height, width = self.cells.shape
+        top, left = max(0, -row), max(0, -col)
+        bottom, right = max(0, row + 1 - height), max(0, col + 1 - width)
+        if top or left or bottom or right:
+            self.cells = np.pad(self.cells, ((top, bottom), (left, right)), constant_values=VOID)
+        return row + top, col + left
+
+    def set(self, row: int, col: int, symbol: str):
+        row, col = self.grow(row, col)
+        self.cells[row, col] = VOID if symbol is None else self.code(symbol)
+        return row, col
+
+    def find(self, symbol: str):
+        found = np.argwhere(self.cells == self.codes[symbol]) if symbol in self.codes else []
+        return [tuple(int(value) for value in position) for position in found]
+
+    def apply_edits(self, edits, max_edits: int = 64, max_growth: int = 2):
+        if not isinstance(edits, list) or len(edits) > max_edits:
+            raise ValueError(f"Map edits must be a list of at most {max_edits} edits")
+        height, width = self.cells.shape
+        cells = []
+        for edit in edits:
+            if not isinstance(edit, dict):
+                raise ValueError(f"Invalid map edit: {edit!r}")
+            row, col, rows, cols = edit.get("row"), edit.get("col"), edit.get("rows", 1), edit.get("cols", 1)
+            tile = edit.get("tile") or None
+            if not all(isinstance(value, int) and not isinstance(value, bool) for value in (row, col, rows, cols)) or rows < 1 or cols < 1:
+                raise ValueError(f"Invalid map edit: {edit!r}")
+            if tile is not None and tile not in self.codes:
+                raise ValueError(f"Unknown map tile: {tile!r}")
+            if row < -max_growth or col < -max_growth or row + rows > height + max_growth or col + cols > width + max_growth:
+                raise ValueError(f"Map edit out of bounds: {edit!r}")
+            cells.extend((r, c, tile) for r in range(row, row + rows) for c in range(col, col + cols))
+
+        grid = self.copy()
+        if not cells:
+            return grid
+        top, left = grid.grow(min(r for r, _, _ in cells), min(c for _, c, _ in cells))
+        top, left = top - min(r for r, _, _ in cells), left - min(c for _, c, _ in cells)
+        grid.grow(max(r for r, _, _ in cells) + top, max(c for _, c, _ in cells) + left)
+        changes = {(r + top, c + left) for r, c, _ in cells}
+        for r, c, tile in cells:
+            grid.cells[r + top, c + left] = VOID if tile is None else self.codes[tile]
+
+        player = self.symbol("Player")
+        if player is not None:
+            players = grid.find(player)
+            placed = [(r + top, c + left) for r, c, tile in cells if tile == player]
+            if len(players) > 1 and placed:
+                for position in players:
+                    if position != placed[-1]:
+                        grid.cells[position] = self.code(" ")
+                        changes.add(position)
+                players = [placed[-1]]
+            if len(players) != 1:
+                raise ValueError("Map edits must leave exactly one player tile")
+        grid.changes = sorted(changes)
+        return grid
+
+    def to_ascii(self) -> str:
+        height, width = self.cells.shape
+        if not height or not width:
+            return ""
+        label = len(str(height - 1))
+        tokens = np.array(["   "] + [f"[{symbol}]" for symbol in self.symbols[1:]], dtype=object)
+        header = " " * (label + 1) + "".join(f"{col:^3}" for col in range(width))
+        lines = [header.rstrip()]
+        for row, cells in enumerate(tokens[self.cells]):
+            lines.append(f"{row:>{label}} {''.join(cells)}".rstrip())
+        return "\n".join(lines)
+
+    def palette(self) -> np.ndarray:
+        return np.array([VOID_COLOR] + [TILE_COLORS.get(self.tiles[symbol], (128, 128, 128)) for symbol in self.symbols[1:]], dtype=np.uint8)
+
+    def to_image(self, cell_size: int = 16):
+        from PIL import Image
+
+        height, width = self.cells.shape
+        side = max(height, width, 1)
+        canvas = np.zeros((side, side), dtype=np.uint8)
+        top, left = (side - height) // 2, (side - width) // 2
+        canvas[top:top + height, left:left + width] = self.cells
+
+        pixels = self.palette()[canvas].repeat(cell_size, axis=0).repeat(cell_size, axis=1)
+        edges = np.zeros(cell_size, dtype=bool)
+        edges[-1] = True
+        border = np.tile(edges, side)
+        filled = (canvas != VOID).repeat(cell_size, axis=0).repeat(cell_size, axis=1)
+        pixels[(border[:, None] | border[None, :]) & filled] //= 2
+        return Image.fromarray(pixels, "RGB")
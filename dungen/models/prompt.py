@@ -0,0 +1,62 @@
+from typing import Callable, Dict, List
+
+
+class ChatPrompt:
+    def __init__(self, system_prompt: str, summary: str = None, count_tokens: Callable[[str], int] = None) -> None:
+        self.count_tokens = count_tokens
+        self.messages: List[Dict[str, str]] = []
+        self.segments: List[str] = []
+        self.token_counts: List[int] = []
+        self.tokens = 0
+        self.prefix_length = 1
+        self.folds = 0
+        self.append("system", system_prompt)
+        self.reset(summary, role="assistant")
+
+    @staticmethod
+    def render_message(role: str, content: str) -> str:
+        return f"<|im_start|>{role}\n{content}<|im_end|>\n"
+
+    def append(self, role: str, content: str) -> None:
+        segment = self.render_message(role, content)
+        token_count = self.count_tokens(segment) if self.count_tokens else 0
+        self.messages.append({"role": role, "content": content})
+        self.segments.append(segment)
+        self.token_counts.append(token_count)
+        self.tokens += token_count
+
+    def reset(self, summary: str = None, role: str = "system") -> None:
+        self.fold(summary, None, role)
+
+    def fold(self, summary: str = None, count: int = None, role: str = "system") -> None:
+        start = self.prefix_length
+        end = len(self.messages) if count is None else min(len(self.messages), start + count)
+        kept = (self.messages[end:], self.segments[end:], self.token_counts[end:])
+
+        del self.messages[1:]
+        del self.segments[1:]
+        del self.token_counts[1:]
+        self.tokens = self.token_counts[0]
+        if summary:
+            self.append(role, f"Once upon a time...\n{summary}")
+        self.prefix_length = len(self.segments)
+        self.folds += 1
+
+        self.messages.extend(kept[0])
+        self.segments.extend(kept[1])
+        self.token_counts.extend(kept[2])
+        self.tokens += sum(kept[2])
+
+    def restore(self, messages: List[Dict[str, str]], token_counts: List[int], prefix_length: int) -> None:
+        self.messages = [dict(message) for message in messages]
+        self.segments = [self.render_message(message["role"], message["content"]) for message in messages]
+        self.token_counts = list(token_counts)
+        self.tokens = sum(self.token_counts)
+        self.prefix_length = prefix_length
+        self.folds += 1
+
+    def body(self) -> List[Dict[str, str]]:
+        return self.messages[self.prefix_length:]
+
+    def render(self) -> str:
+        return "".join(self.segments) + "<|im_start|>assistant\n"
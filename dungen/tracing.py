@@ -0,0 +1,129 @@
+import json
+import time
+import secrets
+import threading
+import contextvars
+from contextlib import contextmanager
+
+current_span = contextvars.ContextVar("dungen_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "end", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, attributes: dict = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start = time.time_ns()
+        self.end = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def add(self, key: str, value) -> None:
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.time_ns()) - self.start) / 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start,
+            "endTimeUnixNano": self.end,
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+
+class NullSpan:
+    def set(self, key, value):
+        pass
+
+    def add(self, key, value):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    def __init__(self):
+        self.path = None
+        self.collect = False
+        self.enabled = False
+        self.finished = {}
+        self.lock = threading.Lock()
+
+    def configure(self, path: str = None, collect: bool = False) -> None:
+        self.path = path or self.path
+        self.collect = collect or self.collect
+        self.enabled = bool(self.path or self.collect)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        if not self.enabled:
+            yield NULL_SPAN
+            return
+        parent = current_span.get()
+        if parent is None:
+            span = Span(name, secrets.token_hex(16), None, attributes)
+        else:
+            span = Span(name, parent.trace_id, parent.span_id, attributes)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as exception:
+            span.error = repr(exception)
+            raise
+        finally:
+            current_span.reset(token)
+            span.end = time.time_ns()
+            self.export(span)
+
+    def current(self):
+        span = current_span.get()
+        return span if span is not None and self.enabled else NULL_SPAN
+
+    def export(self, span: Span) -> None:
+        with self.lock:
+            if self.collect:
+                self.finished.setdefault(span.trace_id, []).append(span)
+            if self.path:
+                with open(self.path, "a") as trace_file:
+                    trace_file.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def drain(self, trace_id: str) -> list:
+        with self.lock:
+            return sorted(self.finished.pop(trace_id, []), key=lambda span: span.start)
+
+
+tracer = Tracer()
+
+
+def record_usage(response) -> None:
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        span = tracer.current()
+        span.add("prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+        span.add("completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
+
+
+def format_spans(spans: list) -> str:
+    depths = {}
+    lines = []
+    for span in spans:
+        depth = depths.get(span.parent_id, -1) + 1
+        depths[span.span_id] = depth
+        attributes = " ".join(f"{key}={value}" for key, value in span.attributes.items())
+        status = " ERROR" if span.error else ""
+        lines.append(f"{'  ' * depth}{span.name:<{28 - 2 * depth}} {span.duration_ms:>9.1f} ms{status}  {attributes}".rstrip())
+    return "\n".join(lines)
@@ -1,3 +1,4 @@
 from .panels import Panels
+from .events import EventPanels, EventConsole
 
-__all__ = ['Panels']
\ No newline at end of file
+__all__ = ['Panels', 'EventPanels', 'EventConsole']
\ No newline at end of file
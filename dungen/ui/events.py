@@ -0,0 +1,92 @@
+import time
+import threading
+
+
+class EventPanels:
+    def __init__(self, config):
+        self.config = config
+
+    def event(self, type: str, title: str, message: str, color: str) -> dict:
+        return {"type": type, "title": title, "text": message, "color": color}
+
+    def render_debug_panel(self, title: str, message: str) -> dict:
+        return self.event("debug", title, message, "bright_black")
+
+    def render_info_panel(self, title: str, message: str) -> dict:
+        return self.event("info", title, message, "bright_black")
+
+    def render_status_panel(self, title: str, message: str) -> dict:
+        return self.event("status", title, message, self.config.status_panel_color)
+
+    def render_char_panel(self, title: str, message: str) -> dict:
+        return self.event("character", title, message, self.config.character_panel_color)
+
+    def render_response_panel(self, title: str, message: str) -> dict:
+        if title == "DUNGEN MASTER":
+            return self.event("narrative", title, message, "green")
+        return self.event("chapter", title, message, "green")
+
+    def stream_response_panel(self, console, title: str, deltas) -> str:
+        console.print(self.event("narrative_start", title, "", "green"))
+        chunks = []
+        try:
+            for delta in deltas:
+                chunks.append(delta)
+                console.print({"type": "narrative_delta", "text": delta})
+        finally:
+            console.print({"type": "narrative_end"})
+        return "".join(chunks).strip()
+
+    def render_map_panel(self, title: str, message: str, changes=None) -> dict:
+        return self.event("map", title, message, self.config.map_panel_color)
+
+    def render_profile_panel(self, title: str, message: str) -> dict:
+        return self.event("profile", title, message, "bright_black")
+
+    def render_end_panel(self, title: str, message: str) -> dict:
+        return self.event("end", title, message, "red")
+
+
+class EventConsole:
+    def __init__(self, emit, frame_interval: float = 0.05):
+        self.emit = emit
+        self.frame_interval = frame_interval
+        self.events = []
+        self.lock = threading.Lock()
+        self.wake = threading.Condition(self.lock)
+        self.streaming = False
+        self.flushed = time.monotonic()
+
+    def print(self, event: dict):
+        with self.lock:
+            if event["type"] == "narrative_delta" and self.events and self.events[-1]["type"] == "narrative_delta":
+                self.events[-1] = {"type": "narrative_delta", "text": self.events[-1]["text"] + event["text"]}
+            else:
+                self.events.append(event)
+            if event["type"] != "narrative_delta" or time.monotonic() - self.flushed >= self.frame_interval:
+                self.send()
+            if event["type"] == "narrative_start" and not self.streaming:
+                self.streaming = True
+                threading.Thread(target=self.flush_deltas, daemon=True).start()
+            elif event["type"] == "narrative_end":
+                self.streaming = False
+            self.wake.notify()
+
+    def flush_deltas(self):
+        with self.lock:
+            while self.streaming:
+                remaining = self.flushed + self.frame_interval - time.monotonic()
+                if self.events and remaining <= 0:
+                    self.send()
+                else:
+                    self.wake.wait(remaining if self.events else None)
+
+    def flush(self):
+        with self.lock:
+            self.send()
+
+    def send(self):
+        events, self.events = self.events, []
+        self.flushed = time.monotonic()
+        if events:
+            self.emit(events)
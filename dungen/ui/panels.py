@@ -1,3 +1,4 @@
+from rich.live import Live
 from rich.panel import Panel
 from rich.text import Text
 
@@ -21,8 +22,30 @@ class Panels:
     def render_response_panel(self, title: str, message: str) -> Panel:
         return Panel(Text(message, justify="left"), title=f"{title}", border_style="green")
 
-    def render_map_panel(self, title: str, message: str) -> Panel:
-        return Panel(Text(message, justify="left"), title=f"{title}", border_style=self.config.map_panel_color)
+    def stream_response_panel(self, console, title: str, deltas) -> str:
+        text = Text("", justify="left")
+        with Live(Panel(text, title=f"{title}", border_style="green"), console=console, transient=True, vertical_overflow="visible", refresh_per_second=12):
+            for delta in deltas:
+                text.append(delta)
+        return text.plain.strip()
+
+    def render_map_panel(self, title: str, message: str, changes=None) -> Panel:
+        text = Text(message, justify="left")
+        if changes:
+            lines = message.split("\n")
+            starts = [0]
+            for line in lines:
+                starts.append(starts[-1] + len(line) + 1)
+            label = len(str(len(lines) - 2))
+            for row, col in changes:
+                if row + 1 < len(lines):
+                    start = label + 1 + 3 * col
+                    if start + 3 <= len(lines[row + 1]):
+                        text.stylize("bold reverse", starts[row + 1] + start, starts[row + 1] + start + 3)
+        return Panel(text, title=f"{title}", border_style=self.config.map_panel_color)
+
+    def render_profile_panel(self, title: str, message: str) -> Panel:
+        return Panel(Text(message, justify="left"), title=f"{title}", border_style="bright_black")
 
     def render_end_panel(self, title: str, message: str) -> Panel:
         return Panel(Text(message, justify="center"), title=f"{title}", border_style="red")
\ No newline at end of file
@@ -0,0 +1,94 @@
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+NGINX_TEMPLATE = """upstream dungen {{
+    ip_hash;
+{servers}
+}}
+
+server {{
+    listen {port};
+
+    location / {{
+        proxy_pass http://dungen;
+        proxy_http_version 1.1;
+        proxy_buffering off;
+        proxy_read_timeout 3600s;
+        proxy_set_header Host $host;
+        proxy_set_header Upgrade $http_upgrade;
+        proxy_set_header Connection "upgrade";
+    }}
+}}
+"""
+
+
+def nginx_config(ports, port=80, host='127.0.0.1'):
+    servers = "\n".join(f"    server {host}:{worker_port};" for worker_port in ports)
+    return NGINX_TEMPLATE.format(servers=servers, port=port)
+
+
+def launch(workers, base_port=5001, host='127.0.0.1', async_mode=None, message_queue=None, server_args=(), env=None, stdout=None):
+    worker_env = dict(os.environ if env is None else env)
+    if async_mode:
+        worker_env['DUNGEN_ASYNC_MODE'] = async_mode
+    if message_queue:
+        worker_env['DUNGEN_MESSAGE_QUEUE'] = message_queue
+
+    processes = []
+    for index in range(workers):
+        command = [sys.executable, '-m', 'dungen.webui.server', '--host', host, '--port', str(base_port + index), '--no-debug', *server_args]
+        processes.append(subprocess.Popen(command, cwd=ROOT_DIR, env=worker_env, stdout=stdout, stderr=subprocess.STDOUT if stdout else None))
+    return processes
+
+
+def terminate(processes, timeout=10):
+    for process in processes:
+        if process.poll() is None:
+            process.send_signal(signal.SIGINT)
+    deadline = time.monotonic() + timeout
+    for process in processes:
+        try:
+            process.wait(max(0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several DUNGEN! Web UI workers behind a sticky load balancer")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of server processes")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface the workers listen on")
+    parser.add_argument("--base-port", type=int, default=5001, help="Port of the first worker, the rest count up from it")
+    parser.add_argument("--async-mode", choices=["threading", "eventlet", "gevent"], help="Flask-SocketIO async mode for the workers")
+    parser.add_argument("--message-queue", help="Message queue URL shared by the workers, e.g. redis://localhost:6379/0")
+    parser.add_argument("--nginx", help="Write an nginx config with ip_hash sticky sessions for the workers to this file")
+    parser.add_argument("--listen", type=int, default=80, help="Port for the generated nginx config")
+    args, server_args = parser.parse_known_args()
+
+    if args.workers > 1 and not args.message_queue:
+        print("Running several workers without --message-queue: each game is only reachable through its own worker.")
+
+    ports = [args.base_port + index for index in range(args.workers)]
+    if args.nginx:
+        with open(args.nginx, "w") as nginx_file:
+            nginx_file.write(nginx_config(ports, args.listen, args.host))
+        print(f"Wrote nginx config for {len(ports)} workers to {args.nginx}")
+
+    processes = launch(args.workers, args.base_port, args.host, args.async_mode, args.message_queue, server_args)
+    print(f"Started {len(processes)} DUNGEN! workers on ports {ports[0]}-{ports[-1]}")
+    try:
+        while all(process.poll() is None for process in processes):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        terminate(processes)
+
+
+if __name__ == '__main__':
+    main()
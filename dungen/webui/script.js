@@ -1,144 +1,188 @@
-import { Terminal } from 'xterm';
-import { FitAddon } from 'xterm-addon-fit';
 import { io } from 'socket.io-client';
-import 'xterm/css/xterm.css';
+
+const PANEL_COLORS = {
+    black: '#000000',
+    red: '#ff6565',
+    green: '#00cc66',
+    yellow: '#e5c07b',
+    blue: '#61afef',
+    magenta: '#c678dd',
+    cyan: '#56b6c2',
+    white: '#ffffff',
+    bright_black: '#333333',
+    bright_red: '#ff6565',
+    bright_green: '#00cc66',
+    bright_yellow: '#ffd580',
+    bright_blue: '#82cfff',
+    bright_magenta: '#e599f7',
+    bright_cyan: '#7fe9ff',
+    bright_white: '#ffffff',
+};
 
 class DungenWebUI {
     constructor() {
-        this.terminal = null;
         this.socket = null;
         this.gameRunning = false;
-        this.inputBuffer = '';
-        this.waitingForInput = false;
+        this.saveAvailable = false;
+        this.player = this.playerId();
+        this.log = null;
+        this.reactionInput = null;
+        this.stream = null;
         this.mapTilesContainer = null;
-        this.mapRefreshInterval = null;
         this.init();
     }
 
     init() {
-        this.initTerminal();
+        this.log = document.getElementById('log');
+        this.reactionInput = document.getElementById('reaction');
         this.initSocket();
         this.bindEvents();
         this.mapTilesContainer = document.getElementById('map-tiles-container');
         this.toggleMapContainer();
     }
 
-    initTerminal() {
-        this.terminal = new Terminal({
-            cursorBlink: true,
-            convertEol: true,
-            cursorStyle: 'block',
-            fontFamily: 'monospace',
-            fontSize: 10,
-            theme: {
-                background: '#000000',
-                foreground: '#ffffff',
-                cursor: '#00cc66',
-                selection: '#00cc66',
-                black: '#000000',
-                red: '#ff6565',
-                green: '#00cc66',
-                brightBlack: '#333333',
-                brightRed: '#ff6565',
-                brightGreen: '#00cc66',
-            },
-            scrollback: 1000
-        });
+    writeLine(text, className) {
+        const line = document.createElement('div');
+        line.className = `line ${className || ''}`;
+        line.textContent = text;
+        this.log.appendChild(line);
+        this.scrollLog();
+    }
 
-        this.terminal.open(document.getElementById('terminal'));
-        
-        const fitAddon = new FitAddon();
-        this.terminal.loadAddon(fitAddon);
-        fitAddon.fit();
+    scrollLog() {
+        this.log.scrollTop = this.log.scrollHeight;
+    }
 
-        window.addEventListener('resize', () => {
-            fitAddon.fit();
-        });
+    renderPanel(event) {
+        const panel = document.createElement('section');
+        panel.className = `panel panel-${event.type}`;
+        panel.style.borderColor = PANEL_COLORS[event.color] || event.color || PANEL_COLORS.white;
 
-        this.terminal.onResize(({ cols, rows }) => {
-            if (this.socket && this.socket.connected) {
-                this.socket.emit('resize', { cols, rows });
-            }
-        });
+        if (event.title) {
+            const title = document.createElement('h2');
+            title.textContent = event.title;
+            title.style.color = panel.style.borderColor;
+            panel.appendChild(title);
+        }
 
-        this.terminal.onData(data => {
-            console.log('[INPUT] ', data);
-            
-            if (!this.gameRunning) {
-                return;
-            }
+        const body = document.createElement('pre');
+        body.textContent = event.text || '';
+        panel.appendChild(body);
 
-            switch (data) {
-                case '\r':
-                case '\n':
-                    if (this.inputBuffer.trim()) {
-                        this.socket.emit('game_input', this.inputBuffer + '\n');
-                        this.terminal.write('\r\n\r\n');
-                        this.inputBuffer = '';
-                    } else {
-                        this.terminal.write('\r\n\r\n');
-                    }
-                    break;
-                case '\u007f':
-                case '\b':
-                    if (this.inputBuffer.length > 0) {
-                        this.inputBuffer = this.inputBuffer.slice(0, -1);
-                        this.terminal.write('\b \b');
-                    }
-                    break;
-                default:
-                    if (data >= ' ' && data.length === 1) {
-                        this.inputBuffer += data;
-                        this.terminal.write(data);
-                    }
-                    break;
-            }
-        });
+        this.log.appendChild(panel);
+        this.scrollLog();
+        return { panel, body };
+    }
 
-        this.terminal.focus();
+    handleEvent(event) {
+        switch (event.type) {
+            case 'narrative_start':
+                this.stream = this.renderPanel(event);
+                this.stream.panel.classList.add('streaming');
+                break;
+            case 'narrative_delta':
+                if (this.stream) {
+                    this.stream.body.textContent += event.text;
+                    this.scrollLog();
+                }
+                break;
+            case 'narrative_end':
+                break;
+            case 'narrative':
+                if (this.stream) {
+                    this.stream.panel.remove();
+                    this.stream = null;
+                }
+                this.renderPanel(event);
+                break;
+            default:
+                this.renderPanel(event);
+                break;
+        }
+    }
+
+    playerId() {
+        let player = localStorage.getItem('dungen-player');
+        if (!player) {
+            player = crypto.randomUUID();
+            localStorage.setItem('dungen-player', player);
+        }
+        return player;
+    }
+
+    checkSave() {
+        this.socket.emit('check_save', {
+            settings: document.getElementById('game-settings').value,
+            player: this.player
+        });
     }
 
     initSocket() {
         this.socket = io();
-        
+
         this.socket.on('connect', () => {
-            this.terminal.writeln('\r\n\x1b[32mCONNECTED TO DUNGEN!\x1b[0m\r\n');
-            if (this.terminal) {
-                this.socket.emit('resize', { cols: this.terminal.cols, rows: this.terminal.rows });
-            }
+            this.writeLine('CONNECTED TO DUNGEN!', 'line-success');
+            this.checkSave();
         });
 
         this.socket.on('disconnect', () => {
-            this.terminal.writeln('\r\n\x1b[31mDISCONNECTED\x1b[0m\r\n');
+            this.writeLine('DISCONNECTED', 'line-error');
             this.gameRunning = false;
             this.updateButtons();
         });
 
-        this.socket.on('game_output', (data) => {
-            this.terminal.write(data);
+        this.socket.on('game_events', (events) => {
+            events.forEach(event => this.handleEvent(event));
         });
 
         this.socket.on('game_started', () => {
             this.gameRunning = true;
             this.updateButtons();
+            this.reactionInput.focus();
+        });
+
+        this.socket.on('game_ready', () => {
+            this.reactionInput.focus();
         });
 
         this.socket.on('game_stopped', () => {
             this.gameRunning = false;
+            this.stream = null;
             this.updateButtons();
             this.mapTilesContainer.innerHTML = '';
-            this.stopMapRefresh();
+            this.checkSave();
+        });
+
+        this.socket.on('save_available', (save) => {
+            if (save.settings === document.getElementById('game-settings').value) {
+                this.saveAvailable = save.available;
+                this.updateButtons();
+            }
+        });
+
+        this.socket.on('tile_ready', (tile) => {
+            this.appendMapTile(tile);
+        });
+
+        this.socket.on('busy', (reaction) => {
+            this.writeLine('The DUNGEN Master is still busy, try again in a moment.', 'line-error');
+            if (!this.reactionInput.value) {
+                this.reactionInput.value = reaction;
+            }
         });
 
         this.socket.on('error', (error) => {
-            this.terminal.writeln(`\r\n\x1b[31m[ERROR] ${error}\x1b[0m`);
+            this.writeLine(`[ERROR] ${error}`, 'line-error');
         });
     }
 
     bindEvents() {
         const startBtn = document.getElementById('start-game');
+        const resumeBtn = document.getElementById('resume-game');
         const endBtn = document.getElementById('end-game');
+        const settingsSelect = document.getElementById('game-settings');
         const mapgenCheckbox = document.getElementById('mapgen-checkbox');
+        const reactionForm = document.getElementById('reaction-form');
 
         startBtn.addEventListener('click', () => this.startGame());
         startBtn.addEventListener('touchstart', (e) => {
@@ -146,6 +190,18 @@ class DungenWebUI {
             this.startGame();
         });
 
+        resumeBtn.addEventListener('click', () => this.startGame(true));
+        resumeBtn.addEventListener('touchstart', (e) => {
+            e.preventDefault();
+            this.startGame(true);
+        });
+
+        settingsSelect.addEventListener('change', () => {
+            this.saveAvailable = false;
+            this.updateButtons();
+            this.checkSave();
+        });
+
         endBtn.addEventListener('click', () => this.stopGame());
         endBtn.addEventListener('touchstart', (e) => {
             e.preventDefault();
@@ -156,120 +212,92 @@ class DungenWebUI {
             this.toggleMapContainer();
         });
 
-        document.getElementById('terminal').addEventListener('click', () => {
-            this.terminal.focus();
+        reactionForm.addEventListener('submit', (e) => {
+            e.preventDefault();
+            this.sendReaction();
         });
+    }
 
-        document.addEventListener('keydown', (e) => {
-            if (this.terminal && document.activeElement === document.getElementById('terminal')) {
-                console.log('[KEYDOWN]', e.key);
-            }
-        });
+    sendReaction() {
+        const reaction = this.reactionInput.value.trim();
+        if (!this.gameRunning || !reaction) {
+            return;
+        }
+        this.writeLine(`REACT! >>>  ${reaction}`, 'line-reaction');
+        this.socket.emit('game_input', reaction + '\n');
+        this.reactionInput.value = '';
     }
 
     toggleMapContainer() {
         const mapgenCheckbox = document.getElementById('mapgen-checkbox');
         const mapTilesContainer = document.getElementById('map-tiles-container');
-        
+
         if (mapgenCheckbox.checked) {
             mapTilesContainer.style.display = 'flex';
         } else {
             mapTilesContainer.style.display = 'none';
             mapTilesContainer.innerHTML = '';
-            this.stopMapRefresh();
         }
     }
 
-    async loadMapTiles() {
+    appendMapTile(tile) {
         const mapgenCheckbox = document.getElementById('mapgen-checkbox');
         if (!mapgenCheckbox.checked) {
             return;
         }
 
-        try {
-            const response = await fetch('/api/map-tiles');
-            const tiles = await response.json();
-            this.displayMapTiles(tiles);
-        } catch (error) {
-            console.error('Failed to load map tiles:', error);
+        const tileElement = document.createElement('img');
+        tileElement.src = tile.url;
+        tileElement.className = 'map-tile';
+        tileElement.alt = `Map tile ${tile.turn}`;
+        tileElement.title = `Turn ${tile.turn}`;
+        if (tile.variants && tile.variants.full) {
+            const tileLink = document.createElement('a');
+            tileLink.href = tile.variants.full;
+            tileLink.target = '_blank';
+            tileLink.appendChild(tileElement);
+            this.mapTilesContainer.appendChild(tileLink);
+        } else {
+            this.mapTilesContainer.appendChild(tileElement);
         }
+        this.mapTilesContainer.scrollLeft = this.mapTilesContainer.scrollWidth;
     }
 
-    displayMapTiles(tiles) {
+    startGame(resume = false) {
+        const gameSettings = document.getElementById('game-settings').value;
         const mapgenCheckbox = document.getElementById('mapgen-checkbox');
-        if (!mapgenCheckbox.checked) {
-            return;
-        }
 
-        this.mapTilesContainer.innerHTML = '';
-        
-        tiles.forEach(tile => {
-            const tileElement = document.createElement('img');
-            tileElement.src = `/assets/mini-map/${tile}`;
-            tileElement.className = 'map-tile';
-            tileElement.alt = `Map tile ${tile}`;
-            tileElement.title = `Turn ${tile.split('_')[1].split('.')[0]}`;
-            this.mapTilesContainer.appendChild(tileElement);
+        this.socket.emit('start_game', {
+            settings: gameSettings,
+            mapGen: mapgenCheckbox.checked,
+            player: this.player,
+            resume: resume
         });
-    }
 
-    startGame() {
-        const gameSettings = document.getElementById('game-settings').value;
-        const mapgenCheckbox = document.getElementById('mapgen-checkbox');
-        const dimensions = { cols: this.terminal.cols, rows: this.terminal.rows };
-        
-        this.socket.emit('start_game', { 
-            settings: gameSettings, 
-            dimensions: dimensions,
-            mapGen: mapgenCheckbox.checked
-        });
-        
+        this.log.innerHTML = '';
         this.mapTilesContainer.innerHTML = '';
-
-        if (mapgenCheckbox.checked) {
-            this.startMapRefresh();
-        }
     }
 
     stopGame() {
         if (this.gameRunning) {
             this.socket.emit('stop_game');
         }
-        this.terminal.write('\r\n');
-        this.terminal.writeln('\r\n\x1b[33mFarewell, adventurer!\x1b[0m');
-        
-        this.mapTilesContainer.innerHTML = '';
-        
-        this.stopMapRefresh();
-    }
+        this.writeLine('Farewell, adventurer!', 'line-farewell');
 
-    startMapRefresh() {
-        const mapgenCheckbox = document.getElementById('mapgen-checkbox');
-        if (!mapgenCheckbox.checked) {
-            return;
-        }
-
-        this.stopMapRefresh();
-        this.mapRefreshInterval = setInterval(() => {
-            this.loadMapTiles();
-        }, 2000);
-    }
-
-    stopMapRefresh() {
-        if (this.mapRefreshInterval) {
-            clearInterval(this.mapRefreshInterval);
-            this.mapRefreshInterval = null;
-        }
+        this.mapTilesContainer.innerHTML = '';
     }
 
     updateButtons() {
         const startBtn = document.getElementById('start-game');
+        const resumeBtn = document.getElementById('resume-game');
         const endBtn = document.getElementById('end-game');
         startBtn.disabled = this.gameRunning;
+        resumeBtn.disabled = this.gameRunning || !this.saveAvailable;
         endBtn.disabled = !this.gameRunning;
+        this.reactionInput.disabled = !this.gameRunning;
     }
 }
 
 document.addEventListener('DOMContentLoaded', () => {
     new DungenWebUI();
-});
\ No newline at end of file
+});
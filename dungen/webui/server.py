@@ -1,122 +1,208 @@
 import os
-import sys
-import threading
-import queue
-import fcntl
-import termios
-import struct
-import select
-import subprocess
-import pty
+
+ASYNC_MODE = os.getenv('DUNGEN_ASYNC_MODE') or None
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
+import re
+import time
 import shutil
-from flask import Flask, send_from_directory
+import secrets
+import argparse
+import tempfile
+import threading
+from flask import Flask, Response, abort, request, send_from_directory
 from flask_socketio import SocketIO, emit
-import glob
-import json
+from dungen.game import Game, TileStore
+from dungen.models import Config
+from dungen.ui import EventPanels, EventConsole
 
 
 app = Flask(__name__)
-socketio = SocketIO(app, cors_allowed_origins="*")
-
-
-def remove_map_tiles():
-    root_dir = os.path.join(os.path.dirname(__file__), '..', '..')
-    tiles_dir = os.path.join(root_dir, 'assets', 'mini-map')
-    
-    tile_files = glob.glob(os.path.join(tiles_dir, 'tile_*.png'))
-    for tile_file in tile_files:
-        os.remove(tile_file)
-
-
-class GameProcess:
-    def __init__(self):
-        self.process = None
-        self.output_queue = queue.Queue()
-        self.running = False
-        self.thread = None
-        self.master_fd = None
-
-    def start(self, settings_file, dimensions, map_gen=False):
-        if self.running:
-            return False
-        
-        if map_gen:
-            remove_map_tiles()
-        
-        game_script = os.path.join(os.path.dirname(__file__), '..', 'main.py')
-        root_dir = os.path.join(os.path.dirname(__file__), '..', '..')
-        settings_path = os.path.join(root_dir, settings_file)
-        
-        pid, self.master_fd = pty.fork()
-
-        if pid == 0:
-            os.chdir(root_dir)
-            cmd = [sys.executable, game_script, '--settings', settings_path, '--vllm', '--webui']
-            if map_gen:
-                cmd.append('--map')
-            os.execvp(cmd[0], cmd)
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE, message_queue=os.getenv('DUNGEN_MESSAGE_QUEUE') or None)
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+CONFIG_PATH = os.path.join(ROOT_DIR, 'config.yaml')
+SETTINGS_DIR = ROOT_DIR
+SAVES_DIR = os.path.join(ROOT_DIR, 'saves')
+REMOTE_INFERENCE = True
+PLAYER_ID = re.compile(r'[A-Za-z0-9_-]{8,64}')
+
+
+def save_base(settings_file, player):
+    if not isinstance(player, str) or not PLAYER_ID.fullmatch(player):
+        return None
+    return os.path.join(SAVES_DIR, player, os.path.splitext(os.path.basename(settings_file))[0])
+
+
+class GameSession:
+    def __init__(self, sid, settings_file, map_gen=False, player=None, resume=False):
+        self.sid = sid
+        self.settings_path = os.path.join(SETTINGS_DIR, os.path.basename(settings_file))
+        self.map_gen = map_gen
+        self.resume = resume
+        self.save_base = save_base(settings_file, player)
+        self.active = True
+        self.busy = False
+        self.game = None
+        self.lock = threading.Lock()
+        self.last_active = time.monotonic()
+        self.console = EventConsole(self.emit_events)
+        self.tile_token = secrets.token_urlsafe(16)
+        self.tile_store = TileStore(tempfile.mkdtemp(prefix='dungen-tiles-'))
+        if self.save_base is None:
+            self.save_dir = tempfile.mkdtemp(prefix='dungen-game-')
         else:
-            self.process = pid
-        
-            attr = termios.tcgetattr(self.master_fd)
-            attr[3] = attr[3] & ~termios.ECHO
-            termios.tcsetattr(self.master_fd, termios.TCSANOW, attr)
-
-            self.resize(dimensions)
-
-            self.running = True
-            self.thread = threading.Thread(target=self._read_output)
-            self.thread.daemon = True
-            self.thread.start()
-        
+            self.save_dir = os.path.dirname(self.save_base)
+            os.makedirs(self.save_dir, exist_ok=True)
+        self.tile_store.subscribe(self.emit_tile)
+
+    def emit_tile(self, tile):
+        if self.active:
+            self.console.flush()
+            socketio.emit('tile_ready', {
+                'url': f"/tiles/{self.tile_token}/{tile['name']}",
+                'turn': tile['turn'],
+                'variants': {label: f"/tiles/{self.tile_token}/{name}" for label, name in tile.get('variants', {}).items()},
+            }, to=self.sid)
+
+    def emit_events(self, events):
+        if self.active:
+            socketio.emit('game_events', events, to=self.sid)
+
+    def start(self):
+        self.run(self._start)
+
+    def _start(self):
+        self.game = Game(
+            inference_config_path=CONFIG_PATH,
+            game_settings_path=self.settings_path,
+            remote_inference=REMOTE_INFERENCE,
+            local_engine=None if REMOTE_INFERENCE else 'batch',
+            map_generation=self.map_gen,
+            webui=True,
+            stream=True,
+            console=self.console,
+            panels=EventPanels(Config(CONFIG_PATH, self.settings_path)),
+            tile_store=self.tile_store,
+            resume=self.resume,
+            snapshot_path=self.save_base + '.save' if self.save_base else None,
+            chapter_path=(self.save_base or os.path.join(self.save_dir, 'chapters')) + '.db',
+        )
+        if not (self.resume and self.game.resume_game()):
+            self.game.intro()
         return True
 
-    def stop(self):
-        if not self.running:
-            return
-        
-        self.running = False
-        
-        if self.process:
-            try:
-                os.kill(self.process, 9)
-                os.waitpid(self.process, 0)
-            except OSError:
-                pass
-            self.process = None
-        
-        if self.master_fd:
-            os.close(self.master_fd)
-            self.master_fd = None
-
-    def _read_output(self):
-        while self.running and self.master_fd:
-            r, _, _ = select.select([self.master_fd], [], [], 0.1)
-            if r:
-                try:
-                    data = os.read(self.master_fd, 1024)
-                    if data:
-                        self.output_queue.put(data.decode('utf-8', 'ignore'))
-                    else:
-                        break
-                except OSError:
-                    break
-        self.running = False
-
     def send_input(self, data):
-        if self.running and self.master_fd:
-            os.write(self.master_fd, data.encode('utf-8'))
-
-    def resize(self, dimensions):
-        if self.master_fd:
-            rows = dimensions.get('rows', 24)
-            cols = dimensions.get('cols', 80)
-            
-            size = struct.pack('HHHH', rows, cols, 0, 0)
-            fcntl.ioctl(self.master_fd, termios.TIOCSWINSZ, size)
+        action = data.strip()
+        if action and self.game is not None and not self.run(self.game.react, action):
+            socketio.emit('busy', action, to=self.sid)
+
+    def run(self, target, *args):
+        with self.lock:
+            if self.busy or not self.active:
+                return False
+            self.busy = True
+            self.last_active = time.monotonic()
+        socketio.start_background_task(self._run, target, *args)
+        return True
 
+    def _run(self, target, *args):
+        try:
+            playing = target(*args) and self.game.state.check_player_status()
+        except Exception as exception:
+            playing = False
+            self.console.flush()
+            if self.active:
+                socketio.emit('error', str(exception), to=self.sid)
+        finally:
+            self.console.flush()
+            with self.lock:
+                self.busy = False
+                self.last_active = time.monotonic()
+                stopped = not self.active
+        if stopped:
+            self.close()
+        elif not playing:
+            sessions.stop(self.sid)
+            socketio.emit('game_stopped', to=self.sid)
+        elif self.active:
+            socketio.emit('game_ready', to=self.sid)
 
-game_process = GameProcess()
+    def stop(self):
+        with self.lock:
+            self.active = False
+            busy = self.busy
+        if not busy:
+            self.close()
+
+    def close(self):
+        if self.game is not None:
+            self.game.shutdown()
+        self.tile_store.clear()
+        if os.path.isdir(self.tile_store.spill_dir):
+            os.rmdir(self.tile_store.spill_dir)
+        if self.save_base is None:
+            shutil.rmtree(self.save_dir, ignore_errors=True)
+
+    def idle(self, timeout):
+        return not self.busy and time.monotonic() - self.last_active > timeout
+
+
+class SessionManager:
+    def __init__(self, max_sessions=16, idle_timeout=1800):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sessions = {}
+        self.tile_tokens = {}
+        self.lock = threading.Lock()
+        self.reaper = None
+
+    def get(self, sid):
+        return self.sessions.get(sid)
+
+    def playing(self, settings_file, player):
+        base = save_base(settings_file, player)
+        with self.lock:
+            return base is not None and any(session.save_base == base for session in self.sessions.values())
+
+    def start(self, sid, settings_file, map_gen=False, player=None, resume=False):
+        with self.lock:
+            if sid in self.sessions or len(self.sessions) >= self.max_sessions:
+                return None
+            session = GameSession(sid, settings_file, map_gen, player, resume)
+            self.sessions[sid] = session
+            self.tile_tokens[session.tile_token] = session
+            if self.reaper is None:
+                self.reaper = socketio.start_background_task(self.evict_idle)
+        session.start()
+        return session
+
+    def stop(self, sid):
+        with self.lock:
+            session = self.sessions.pop(sid, None)
+            if session is not None:
+                self.tile_tokens.pop(session.tile_token, None)
+        if session is not None:
+            session.stop()
+        return session
+
+    def evict_idle(self):
+        while True:
+            socketio.sleep(min(60, self.idle_timeout))
+            with self.lock:
+                idle = [sid for sid, session in self.sessions.items() if session.idle(self.idle_timeout)]
+            for sid in idle:
+                self.stop(sid)
+                socketio.emit('game_stopped', to=sid)
+                print(f'[SESSION EVICTED] {sid}')
+
+
+sessions = SessionManager()
 
 
 @app.route('/')
@@ -129,76 +215,92 @@ def dist(filename):
     return send_from_directory('dist', filename)
 
 
-@app.route('/assets/mini-map/<path:filename>')
-def serve_map_tiles(filename):
-    root_dir = os.path.join(os.path.dirname(__file__), '..', '..')
-    return send_from_directory(os.path.join(root_dir, 'assets', 'mini-map'), filename)
+@app.route('/tiles/<token>/<name>')
+def serve_map_tile(token, name):
+    session = sessions.tile_tokens.get(token)
+    stored = session.tile_store.get(name) if session is not None else None
+    if stored is None:
+        abort(404)
+    data, tile = stored
 
-
-@app.route('/api/map-tiles')
-def get_map_tiles():
-    root_dir = os.path.join(os.path.dirname(__file__), '..', '..')
-    tiles_dir = os.path.join(root_dir, 'assets', 'mini-map')
-    tile_files = glob.glob(os.path.join(tiles_dir, 'tile_*.png'))
-    tile_files.sort(key=lambda x: int(x.split('_')[-1].split('.')[0]))
-    tiles = [os.path.basename(f) for f in tile_files]
-    return json.dumps(tiles)
+    headers = {
+        'ETag': f'"{tile["etag"]}"',
+        'Cache-Control': 'public, max-age=31536000, immutable',
+    }
+    if tile['etag'] in request.if_none_match:
+        return Response(status=304, headers=headers)
+    return Response(data, mimetype=tile['mimetype'], headers=headers)
 
 
 @socketio.on('connect')
 def handle_connect():
-    print('[CLIENT CONNECTED]')
+    print(f'[CLIENT CONNECTED] {request.sid}')
 
 
 @socketio.on('disconnect')
 def handle_disconnect():
-    print('[CLIENT DISCONNECTED]')
+    sessions.stop(request.sid)
+    print(f'[CLIENT DISCONNECTED] {request.sid}')
 
 
 @socketio.on('start_game')
 def handle_start_game(data):
     settings_file = data.get('settings', 'fantasy.yaml')
-    dimensions = data.get('dimensions', {'cols': 80, 'rows': 24})
     map_gen = data.get('mapGen', False)
-    
-    if game_process.start(settings_file, dimensions, map_gen):
+    player = data.get('player')
+
+    if sessions.get(request.sid) is not None:
+        return
+
+    if sessions.playing(settings_file, player):
+        emit('error', 'This adventure is already being played in another tab.')
+    elif sessions.start(request.sid, settings_file, map_gen, player, bool(data.get('resume'))):
         emit('game_started')
-        
-        def forward_output():
-            while game_process.running:
-                try:
-                    output = game_process.output_queue.get(timeout=0.1)
-                    socketio.emit('game_output', output)
-                except queue.Empty:
-                    continue
-        
-        output_thread = threading.Thread(target=forward_output)
-        output_thread.daemon = True
-        output_thread.start()
+    else:
+        emit('error', 'The DUNGEN is full, try again in a little while.')
+
+
+@socketio.on('check_save')
+def handle_check_save(data):
+    settings_file = data.get('settings', 'fantasy.yaml')
+    base = save_base(settings_file, data.get('player'))
+    emit('save_available', {'settings': settings_file, 'available': base is not None and os.path.exists(base + '.save')})
 
 
 @socketio.on('stop_game')
 def handle_stop_game():
-    game_process.stop()
-
-    remove_map_tiles()
-    
+    sessions.stop(request.sid)
     emit('game_stopped')
 
 
 @socketio.on('game_input')
 def handle_game_input(data):
-    if game_process.running:
-        game_process.send_input(data)
-
-
-@socketio.on('resize')
-def handle_resize(data):
-    if game_process.running:
-        game_process.resize({'cols': data['cols'], 'rows': data['rows']})
+    session = sessions.get(request.sid)
+    if session is not None:
+        session.send_input(data)
 
 
 if __name__ == '__main__':
-    print("Starting DUNGEN! Web UI server...")
-    print("Open your browser to http://localhost:5000")
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="DUNGEN! Web UI server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--max-sessions", type=int, default=16, help="Maximum number of concurrent games")
+    parser.add_argument("--idle-timeout", type=int, default=1800, help="Seconds before an idle game is evicted")
+    parser.add_argument("--inference", default=CONFIG_PATH, help="Path to model configuration YAML file")
+    parser.add_argument("--settings-dir", default=SETTINGS_DIR, help="Directory holding the game settings files")
+    parser.add_argument("--saves-dir", default=SAVES_DIR, help="Directory holding each player's saved games")
+    parser.add_argument("--local", action="store_true", help="Run the narrative model on this machine, batching every game through one shared engine")
+    parser.add_argument("--no-debug", dest="debug", action="store_false", help="Disable Flask debug mode (used by launch.py workers)")
+    args = parser.parse_args()
+
+    sessions.max_sessions = args.max_sessions
+    sessions.idle_timeout = args.idle_timeout
+    CONFIG_PATH = os.path.abspath(args.inference)
+    SETTINGS_DIR = os.path.abspath(args.settings_dir)
+    SAVES_DIR = os.path.abspath(args.saves_dir)
+    REMOTE_INFERENCE = not args.local
+    os.chdir(ROOT_DIR)
+
+    print(f"Starting DUNGEN! Web UI server ({socketio.async_mode})...")
+    print(f"Open your browser to http://localhost:{args.port}")
+    socketio.run(app, host=args.host, port=args.port, debug=args.debug, use_reloader=False, allow_unsafe_werkzeug=True)
@@ -66,12 +66,16 @@ setup(
         'pyyaml',
         'pyarrow',
         'openai',
+        'requests',
         'transformers',
         'torch',
         'accelerate',
         'flask',
         'flask-socketio',
         'pillow',
+        'numpy',
+        'msgpack',
+        'lm-format-enforcer',
     ],
 
     # List additional groups of dependencies here (e.g. development